@@ -0,0 +1,445 @@
+"""
+메모리 기반 가짜 Google Sheets 백엔드 (부하 테스트 / 오프라인 확인용)
+
+toptenKeyword에서 사용하는 Sheets API 일부를 흉내 냅니다.
+    spreadsheets().values().get / append / update / batchGet / batchUpdate
+    spreadsheets().get (ranges, fields)
+    spreadsheets().batchUpdate (repeatCell)
+    (Drive) files().get (modifiedTime)
+
+행 데이터와 셀 서식(userEnteredFormat)을 메모리에 저장하고, 요청마다 지연 시간과
+429(할당량 초과) 오류를 설정에 따라 발생시킬 수 있습니다. 메서드별 호출 횟수는 calls에 기록됩니다.
+
+부하 테스트:
+    python fakeSheets.py --categories 1000 --latency 0.01 --error-rate 0.02
+
+호출 수/입력 행/서식 결과 확인: tests/test_toptenKeyword.py
+"""
+from collections import Counter
+import copy
+from datetime import datetime
+import random
+import re
+import threading
+import time
+
+class FakeHttpError(Exception):
+    """googleapiclient의 HttpError처럼 resp.status를 가진 오류"""
+    class _Resp:
+        def __init__(self, status):
+            self.status = status
+
+    def __init__(self, status, message=''):
+        super().__init__(f"<FakeHttpError {status}: {message}>")
+        self.resp = self._Resp(status)
+
+def column_to_index(column):
+    """'A' → 0, 'J' → 9, 'AA' → 26"""
+    index = 0
+    for char in column:
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+def index_to_column(index):
+    """0 → 'A', 9 → 'J', 26 → 'AA'"""
+    column = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        column = chr(ord('A') + remainder) + column
+    return column
+
+_A1_PATTERN = re.compile(r"^(?:'((?:[^']|'')+)'|([^!]+))!([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+def parse_a1(a1_range):
+    """
+    A1 표기 범위를 해석합니다.
+
+    Returns:
+        (시트 이름, 시작 행, 시작 열, 끝 행, 끝 열) - 행/열은 0-based, 끝은 포함하지 않음.
+        열린 범위(A:H의 행, 5:5의 열)는 None
+    """
+    match = _A1_PATTERN.match(a1_range)
+    if not match:
+        raise FakeHttpError(400, f"잘못된 범위: {a1_range}")
+    sheet_name = (match.group(1) or '').replace("''", "'") or match.group(2)
+    start_col, start_row, end_col, end_row = match.group(3), match.group(4), match.group(5), match.group(6)
+    if match.group(5) is None and match.group(6) is None:
+        # 단일 셀 또는 단일 열/행
+        end_col, end_row = start_col, start_row
+
+    row_start = int(start_row) - 1 if start_row else 0
+    col_start = column_to_index(start_col) if start_col else 0
+    row_end = int(end_row) if end_row else None
+    col_end = column_to_index(end_col) + 1 if end_col else None
+    return sheet_name, row_start, col_start, row_end, col_end
+
+class _FakeRequest:
+    """execute()를 호출해야 실제로 동작하는 요청 객체"""
+    def __init__(self, backend, method, func):
+        self._backend = backend
+        self._method = method
+        self._func = func
+
+    def execute(self, num_retries=0):
+        return self._backend._execute(self._method, self._func)
+
+class _FakeSheet:
+    """시트 하나의 행 데이터와 셀 서식"""
+    def __init__(self, title, sheet_id):
+        self.title = title
+        self.sheet_id = sheet_id
+        self.rows = []      # 행 값 리스트의 리스트 (문자열)
+        self.formats = {}   # (행, 열) → userEnteredFormat 딕셔너리
+
+    def last_row(self):
+        """값이 있는 마지막 행의 개수 (1-based 마지막 행 번호)"""
+        for idx in range(len(self.rows), 0, -1):
+            if any(cell != '' for cell in self.rows[idx - 1]):
+                return idx
+        return 0
+
+    def read(self, row_start, col_start, row_end, col_end):
+        if row_end is None:
+            row_end = len(self.rows)
+        values = []
+        for row in self.rows[row_start:row_end]:
+            cells = row[col_start:col_end] if col_end is not None else row[col_start:]
+            cells = list(cells)
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        # API처럼 끝쪽의 빈 행은 생략
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def write(self, row_start, col_start, values):
+        for r, row_values in enumerate(values):
+            row_idx = row_start + r
+            while len(self.rows) <= row_idx:
+                self.rows.append([])
+            row = self.rows[row_idx]
+            for c, value in enumerate(row_values):
+                col_idx = col_start + c
+                while len(row) <= col_idx:
+                    row.append('')
+                row[col_idx] = '' if value is None else str(value)
+
+class FakeSpreadsheets:
+    """
+    service.spreadsheets()를 대신하는 메모리 기반 백엔드
+
+    Args:
+        latency: 요청마다 추가할 지연 시간 (초)
+        error_rate: 요청이 429 오류로 실패할 확률 (0.0 ~ 1.0)
+        seed: 429 발생용 난수 시드
+    """
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.errors = Counter()
+        self.spreadsheets = {}  # spreadsheet_id → {시트 이름: _FakeSheet}
+        self.modified_times = {}
+        self.lock = threading.Lock()
+
+    # ---- 데이터 준비 / 확인용 ----
+
+    def add_sheet(self, spreadsheet_id, title, rows=None):
+        """스프레드시트에 시트를 추가하고 초기 행 데이터를 채웁니다."""
+        sheets = self.spreadsheets.setdefault(spreadsheet_id, {})
+        fake_sheet = _FakeSheet(title, len(sheets) + 1)
+        if rows:
+            fake_sheet.write(0, 0, rows)
+        sheets[title] = fake_sheet
+        self._touch(spreadsheet_id)
+        return fake_sheet
+
+    def get_rows(self, spreadsheet_id, title):
+        return self._sheet(spreadsheet_id, title).rows
+
+    def get_format(self, spreadsheet_id, title, row, col):
+        """셀 서식 (row, col은 0-based)"""
+        return self._sheet(spreadsheet_id, title).formats.get((row, col), {})
+
+    # ---- 내부 동작 ----
+
+    def _sheet(self, spreadsheet_id, title):
+        sheets = self.spreadsheets.get(spreadsheet_id)
+        if sheets is None:
+            raise FakeHttpError(404, f"스프레드시트 없음: {spreadsheet_id}")
+        if title not in sheets:
+            raise FakeHttpError(400, f"시트 없음: {title}")
+        return sheets[title]
+
+    def _sheet_by_id(self, spreadsheet_id, sheet_id):
+        for fake_sheet in self.spreadsheets.get(spreadsheet_id, {}).values():
+            if fake_sheet.sheet_id == sheet_id:
+                return fake_sheet
+        raise FakeHttpError(400, f"시트 ID 없음: {sheet_id}")
+
+    def _touch(self, spreadsheet_id):
+        self.modified_times[spreadsheet_id] = datetime.now().isoformat() + 'Z'
+
+    def _execute(self, method, func):
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors[method] += 1
+            raise FakeHttpError(429, 'Quota exceeded')
+        with self.lock:
+            return func()
+
+    def _request(self, method, func):
+        return _FakeRequest(self, method, func)
+
+    # ---- spreadsheets() ----
+
+    def values(self):
+        return _FakeValues(self)
+
+    def get(self, spreadsheetId, ranges=None, fields=None, includeGridData=False):
+        def run():
+            sheets = self.spreadsheets.get(spreadsheetId)
+            if sheets is None:
+                raise FakeHttpError(404, f"스프레드시트 없음: {spreadsheetId}")
+            if ranges and fields and 'rowData' in fields:
+                result = []
+                for a1_range in ranges:
+                    title, row_start, col_start, row_end, col_end = parse_a1(a1_range)
+                    fake_sheet = self._sheet(spreadsheetId, title)
+                    row_end = row_end if row_end is not None else max(len(fake_sheet.rows), row_start + 1)
+                    col_end = col_end if col_end is not None else col_start + 1
+                    row_data = []
+                    for row in range(row_start, row_end):
+                        row_data.append({'values': [
+                            {'userEnteredFormat': copy.deepcopy(fake_sheet.formats[(row, col)])}
+                            if (row, col) in fake_sheet.formats else {}
+                            for col in range(col_start, col_end)
+                        ]})
+                    result.append({'data': [{'rowData': row_data}]})
+                return {'sheets': result}
+            return {'sheets': [
+                {'properties': {
+                    'sheetId': fake_sheet.sheet_id,
+                    'title': fake_sheet.title,
+                    'gridProperties': {'rowCount': max(len(fake_sheet.rows), 1000), 'columnCount': 26}
+                }}
+                for fake_sheet in sheets.values()
+            ]}
+        return self._request('spreadsheets.get', run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def run():
+            replies = []
+            for request in body.get('requests', []):
+                if 'repeatCell' not in request:
+                    raise FakeHttpError(400, f"지원하지 않는 요청: {list(request)}")
+                self._repeat_cell(spreadsheetId, request['repeatCell'])
+                replies.append({})
+            self._touch(spreadsheetId)
+            return {'spreadsheetId': spreadsheetId, 'replies': replies}
+        return self._request('spreadsheets.batchUpdate', run)
+
+    def _repeat_cell(self, spreadsheet_id, repeat_cell):
+        grid = repeat_cell['range']
+        fake_sheet = self._sheet_by_id(spreadsheet_id, grid['sheetId'])
+        cell_format = repeat_cell.get('cell', {}).get('userEnteredFormat', {})
+        fields = [field.strip() for field in repeat_cell['fields'].split(',')]
+        for row in range(grid.get('startRowIndex', 0), grid['endRowIndex']):
+            for col in range(grid.get('startColumnIndex', 0), grid['endColumnIndex']):
+                target = fake_sheet.formats.setdefault((row, col), {})
+                for field in fields:
+                    path = field.split('.')
+                    if path[0] == 'userEnteredFormat':
+                        path = path[1:]
+                    _copy_field(cell_format, target, path)
+
+def _copy_field(source, target, path):
+    """source의 path 위치 값을 target의 같은 위치에 복사합니다. (fields 마스크 적용)"""
+    for key in path[:-1]:
+        source = source.get(key, {})
+        target = target.setdefault(key, {})
+    if path[-1] in source:
+        target[path[-1]] = copy.deepcopy(source[path[-1]])
+    else:
+        target.pop(path[-1], None)
+
+class _FakeValues:
+    """spreadsheets().values()"""
+    def __init__(self, backend):
+        self._backend = backend
+
+    def get(self, spreadsheetId, range, **kwargs):
+        backend = self._backend
+
+        def run():
+            title, row_start, col_start, row_end, col_end = parse_a1(range)
+            values = backend._sheet(spreadsheetId, title).read(row_start, col_start, row_end, col_end)
+            result = {'range': range, 'majorDimension': 'ROWS'}
+            if values:
+                result['values'] = values
+            return result
+        return backend._request('values.get', run)
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        backend = self._backend
+
+        def run():
+            value_ranges = []
+            for a1_range in ranges:
+                title, row_start, col_start, row_end, col_end = parse_a1(a1_range)
+                values = backend._sheet(spreadsheetId, title).read(row_start, col_start, row_end, col_end)
+                value_range = {'range': a1_range, 'majorDimension': 'ROWS'}
+                if values:
+                    value_range['values'] = values
+                value_ranges.append(value_range)
+            return {'spreadsheetId': spreadsheetId, 'valueRanges': value_ranges}
+        return backend._request('values.batchGet', run)
+
+    def update(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        backend = self._backend
+
+        def run():
+            title, row_start, col_start, _, _ = parse_a1(range)
+            values = body.get('values', [])
+            backend._sheet(spreadsheetId, title).write(row_start, col_start, values)
+            backend._touch(spreadsheetId)
+            return {'updatedRange': range, 'updatedCells': sum(len(row) for row in values)}
+        return backend._request('values.update', run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        backend = self._backend
+
+        def run():
+            updated_cells = 0
+            for data in body.get('data', []):
+                title, row_start, col_start, _, _ = parse_a1(data['range'])
+                backend._sheet(spreadsheetId, title).write(row_start, col_start, data.get('values', []))
+                updated_cells += sum(len(row) for row in data.get('values', []))
+            backend._touch(spreadsheetId)
+            return {'spreadsheetId': spreadsheetId, 'totalUpdatedCells': updated_cells}
+        return backend._request('values.batchUpdate', run)
+
+    def append(self, spreadsheetId, range, body, valueInputOption=None, insertDataOption=None, **kwargs):
+        backend = self._backend
+
+        def run():
+            title, _, col_start, _, _ = parse_a1(range)
+            fake_sheet = backend._sheet(spreadsheetId, title)
+            values = body.get('values', [])
+            start_row = fake_sheet.last_row()  # 0-based 다음 행
+            fake_sheet.write(start_row, col_start, values)
+            backend._touch(spreadsheetId)
+            width = max((len(row) for row in values), default=1)
+            updated_range = (f"'{title}'!{index_to_column(col_start)}{start_row + 1}:"
+                             f"{index_to_column(col_start + width - 1)}{start_row + len(values)}")
+            return {
+                'spreadsheetId': spreadsheetId,
+                'updates': {
+                    'updatedRange': updated_range,
+                    'updatedRows': len(values),
+                    'updatedCells': sum(len(row) for row in values)
+                }
+            }
+        return backend._request('values.append', run)
+
+class FakeDriveFiles:
+    """Drive files()를 대신하는 객체 (modifiedTime만 지원)"""
+    def __init__(self, backend):
+        self._backend = backend
+
+    def get(self, fileId, fields=None):
+        backend = self._backend
+
+        def run():
+            if fileId not in backend.modified_times:
+                raise FakeHttpError(404, f"파일 없음: {fileId}")
+            return {'id': fileId, 'modifiedTime': backend.modified_times[fileId]}
+        return backend._request('drive.files.get', run)
+
+def make_keyword_html(category_name, keywords):
+    """parse_keywords가 읽을 수 있는 탑텐키워드 페이지 HTML을 만듭니다. (테스트 데이터용)"""
+    items = ''.join(
+        '<div class="_keyword-item-container_1vje2_11">'
+        f'<div class="_keyword-item-number_1vje2_22">{rank}</div>'
+        f'<div class="_keyword-item-content_1vje2_46">{keyword}</div>'
+        '</div>'
+        for rank, keyword in enumerate(keywords, start=1)
+    )
+    return f'<div><strong data-v-53787c54="">"{category_name}"</strong>{items}</div>'
+
+def run_load_test(categories=1000, keywords_per_category=10, latency=0.0, error_rate=0.0, seed=0):
+    """
+    가짜 백엔드에 카테고리 행을 채우고 toptenKeyword.main()을 실행해 호출 수와 결과를 확인합니다.
+
+    Returns:
+        (FakeSpreadsheets, 소요 시간(초))
+    """
+    import contextlib
+    import io
+    import os
+    import tempfile
+
+    import toptenKeyword
+    from keywordIndex import KeywordIndex
+    from multiRunner import RateLimitedSheet, RateLimiter
+    from rankHistory import RankHistoryIndex
+    from runJournal import RunJournal
+
+    spreadsheet_id = 'fake-spreadsheet'
+    backend = FakeSpreadsheets(latency=latency, error_rate=error_rate, seed=seed)
+
+    rng = random.Random(seed)
+    keyword_pool = [f"키워드{n}" for n in range(keywords_per_category * 3)]
+    source_rows = [['카테고리ID', 'B', 'C', '카테고리명', 'E', 'F', 'G', 'H', 'HTML', '로그']]
+    for idx in range(categories):
+        category_name = f"카테고리{idx}"
+        keywords = rng.sample(keyword_pool, keywords_per_category)
+        source_rows.append([str(1000 + idx), '', '', category_name, '', '', '', '',
+                            make_keyword_html(category_name, keywords), ''])
+    backend.add_sheet(spreadsheet_id, toptenKeyword.SOURCE_SHEET_NAME, source_rows)
+    backend.add_sheet(spreadsheet_id, toptenKeyword.SHEET_NAME,
+                      [['날짜', '유형', '카테고리ID', '카테고리', '순위', '키워드', '순위상승', '체크']])
+
+    # 429는 실제 실행과 같은 재시도 래퍼로 처리 (속도 제한 없음)
+    sheet = RateLimitedSheet(backend, RateLimiter(0), retry_base_delay=0.01)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal = RunJournal(os.path.join(tmp_dir, 'journal.jsonl'))
+        keyword_index = KeywordIndex(os.path.join(tmp_dir, 'keyword_index.jsonl'))
+        history = RankHistoryIndex(os.path.join(tmp_dir, 'rank_history.bin'))
+        start_time = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            toptenKeyword.main(spreadsheet_id, sheet=sheet, confirm=False, journal=journal,
+                               history=history, keyword_index=keyword_index)
+        elapsed = time.time() - start_time
+
+    return backend, elapsed
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="가짜 Sheets 백엔드로 write_to_sheet / main() 부하 테스트")
+    parser.add_argument('--categories', type=int, default=1000)
+    parser.add_argument('--keywords', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help="요청당 지연 시간 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="429 발생 확률 (0.0 ~ 1.0)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    import toptenKeyword
+
+    backend, elapsed = run_load_test(args.categories, args.keywords, args.latency, args.error_rate, args.seed)
+    history_rows = backend.get_rows('fake-spreadsheet', toptenKeyword.SHEET_NAME)
+    source_rows = backend.get_rows('fake-spreadsheet', toptenKeyword.SOURCE_SHEET_NAME)
+    logged = sum(1 for row in source_rows[1:] if len(row) > 9 and row[9])
+
+    print(f"카테고리 {args.categories}개 처리: {elapsed:.2f}초")
+    print(f"  추가된 이력 행: {len(history_rows) - 1}개, J열 로그: {logged}개")
+    print(f"  API 호출 수: 총 {sum(backend.calls.values())}회")
+    for method, count in sorted(backend.calls.items()):
+        print(f"    {method}: {count}회 (429: {backend.errors[method]}회)")
@@ -0,0 +1,458 @@
+"""
+탑텐키워드 처리의 핵심 로직 (HTML 파싱, 순위 변화 계산, 서식 요청 생성)
+
+Google API나 인증 모듈에 의존하지 않으므로 다른 도구나 작업자 프로세스에서도 가볍게 import할 수 있습니다.
+BeautifulSoup(bs4)은 parse_keywords를 처음 호출할 때 불러옵니다.
+"""
+from datetime import datetime
+from functools import lru_cache
+import re
+import unicodedata
+
+def _get_beautiful_soup():
+    """bs4는 import 비용이 크므로 실제로 파싱할 때 불러옵니다."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup
+
+def parse_keywords(html_content, category_id=''):
+    """
+    HTML 콘텐츠를 파싱하여 키워드 정보를 추출합니다.
+    
+    Args:
+        html_content: HTML 문자열
+        category_id: 카테고리ID (기본값: 빈 문자열)
+    
+    Returns:
+        추출된 키워드 정보 리스트
+    """
+    BeautifulSoup = _get_beautiful_soup()
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # 오늘 날짜
+    today = datetime.now().strftime('%Y-%m-%d')
+    
+    # 카테고리 추출 (strong 태그에서 "여성패션" 같은 텍스트 추출)
+    category_tag = soup.find('strong', {'data-v-53787c54': ''})
+    category = ''
+    if category_tag:
+        category_text = category_tag.get_text(strip=True)
+        # 따옴표 제거
+        category = category_text.strip('"')
+    
+    # 키워드 항목들 추출
+    keyword_items = soup.find_all('div', class_='_keyword-item-container_1vje2_11')
+    
+    results = []
+    seen_keywords = set()
+    
+    for item in keyword_items:
+        # 순위 추출
+        rank_tag = item.find('div', class_='_keyword-item-number_1vje2_22')
+        rank = ''
+        if rank_tag:
+            rank = rank_tag.get_text(strip=True)
+        
+        # 키워드 추출
+        keyword_tag = item.find('div', class_='_keyword-item-content_1vje2_46')
+        keyword = ''
+        if keyword_tag:
+            # 공백/전각 문자 차이로 같은 키워드가 다르게 저장되지 않도록 정규화
+            keyword = normalize_keyword(keyword_tag.get_text(strip=True))
+        
+        # 순위와 키워드가 모두 있을 때만 결과에 추가 (정규화 후 중복이면 먼저 나온 순위만 사용)
+        if rank and keyword and keyword not in seen_keywords:
+            seen_keywords.add(keyword)
+            result = {
+                '오늘날짜': today,
+                '유형': 'cp_keyword',
+                '카테고리ID': category_id,
+                '카테고리': category,
+                '순위': rank,
+                '순위상승': '',
+                '키워드': keyword
+            }
+            results.append(result)
+    
+    return results
+
+def is_light_gray1(rgb_color):
+    """
+    RGB 색상이 연한 회색1인지 확인합니다.
+    
+    Args:
+        rgb_color: RGB 색상 딕셔너리 또는 None
+    
+    Returns:
+        연한 회색1이면 True, 아니면 False
+    """
+    if rgb_color is None:
+        return False
+    
+    # RGB 값 추출 (0.0 ~ 1.0 범위)
+    red = rgb_color.get('red', 0.0)
+    green = rgb_color.get('green', 0.0)
+    blue = rgb_color.get('blue', 0.0)
+    
+    # 연한 회색1: RGB(217, 217, 217) = (0.851, 0.851, 0.851)
+    # 약간의 오차 허용 (0.84 ~ 0.86)
+    if (0.84 <= red <= 0.86 and 
+        0.84 <= green <= 0.86 and 
+        0.84 <= blue <= 0.86):
+        return True
+    
+    return False
+
+def is_light_gray2(rgb_color):
+    """
+    RGB 색상이 연한 회색2인지 확인합니다.
+    
+    Args:
+        rgb_color: RGB 색상 딕셔너리 또는 None
+    
+    Returns:
+        연한 회색2이면 True, 아니면 False
+    """
+    if rgb_color is None:
+        return False
+    
+    # RGB 값 추출 (0.0 ~ 1.0 범위)
+    red = rgb_color.get('red', 0.0)
+    green = rgb_color.get('green', 0.0)
+    blue = rgb_color.get('blue', 0.0)
+    
+    # 연한 회색2: RGB(191, 191, 191) = (0.749, 0.749, 0.749)
+    # 약간의 오차 허용 (0.73 ~ 0.77)
+    if (0.73 <= red <= 0.77 and 
+        0.73 <= green <= 0.77 and 
+        0.73 <= blue <= 0.77):
+        return True
+    
+    return False
+
+def is_white_or_no_color(rgb_color):
+    """
+    RGB 색상이 흰색이거나 없는지 확인합니다.
+    
+    Args:
+        rgb_color: RGB 색상 딕셔너리 또는 None
+    
+    Returns:
+        흰색이거나 없으면 True, 아니면 False
+    """
+    if rgb_color is None:
+        return True
+    
+    # RGB 값 추출 (0.0 ~ 1.0 범위)
+    red = rgb_color.get('red', 1.0)
+    green = rgb_color.get('green', 1.0)
+    blue = rgb_color.get('blue', 1.0)
+    
+    # 흰색인지 확인 (모든 값이 1.0에 가까우면 흰색)
+    # 또는 alpha가 0이면 투명(색상 없음)
+    alpha = rgb_color.get('alpha', 1.0)
+    
+    if alpha == 0.0:
+        return True
+    
+    # 흰색 체크 (1.0 또는 0.99 이상)
+    if red >= 0.99 and green >= 0.99 and blue >= 0.99:
+        return True
+    
+    return False
+
+# G열(순위상승) 텍스트 색상 템플릿
+# 요청마다 중첩 dict 리터럴을 새로 만들지 않도록 미리 만들어 두고 재사용합니다.
+TEXT_COLOR_FIELDS = 'userEnteredFormat.textFormat.foregroundColor'
+TEXT_COLOR_FORMATS = {
+    'red': {'userEnteredFormat': {'textFormat': {'foregroundColor': {'red': 1.0, 'green': 0.0, 'blue': 0.0}}}},
+    'blue': {'userEnteredFormat': {'textFormat': {'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 1.0}}}},
+    'black': {'userEnteredFormat': {'textFormat': {'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0}}}},
+}
+
+# 행 배경색 템플릿 (A열 ~ I열)
+BACKGROUND_FIELDS = 'userEnteredFormat.backgroundColor'
+BACKGROUND_FORMATS = {
+    # 연한 회색2 (RGB: 230, 230, 230) - 더 연한 회색
+    'gray': {'userEnteredFormat': {'backgroundColor': {'red': 230.0 / 255.0, 'green': 230.0 / 255.0, 'blue': 230.0 / 255.0}}},
+    # 흰색 (RGB: 255, 255, 255)
+    'white': {'userEnteredFormat': {'backgroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}}},
+}
+
+def get_rank_change_color(rank_change):
+    """
+    순위상승 값에 해당하는 G열 텍스트 색상을 반환합니다.
+    
+    Args:
+        rank_change: 순위상승 문자열 ("▲3", "▼2", "(-)", "new")
+    
+    Returns:
+        'red' (▲, new), 'blue' (▼), 'black' ((-)) 또는 None (색상 지정 안 함)
+    """
+    if rank_change.startswith('▲') or rank_change == 'new':
+        return 'red'
+    elif rank_change.startswith('▼'):
+        return 'blue'
+    elif rank_change == '(-)':
+        return 'black'
+    return None
+
+def build_format_requests(sheet_id, start_row, rank_changes, background=None, colors=None):
+    """
+    추가된 행들의 서식 요청(repeatCell) 목록을 만듭니다.
+    같은 색상이 연속되는 행은 하나의 범위로 묶고, 배경색 요청도 같은 목록에 담아
+    한 번의 batchUpdate로 보낼 수 있게 합니다.
+    
+    Args:
+        sheet_id: 시트 ID
+        start_row: 첫 번째 추가 행 번호 (1-based)
+        rank_changes: 행 순서대로의 순위상승 문자열 리스트
+        background: 'gray', 'white' 또는 None (배경색 적용 안 함)
+        colors: 행 순서대로의 G열 색상 리스트 (calculate_rank_changes 결과, 없으면 rank_changes로 계산)
+    
+    Returns:
+        batchUpdate 요청 리스트
+    """
+    requests = []
+    first_row_idx = start_row - 1  # 0-based index
+    
+    if background and rank_changes:
+        requests.append({
+            'repeatCell': {
+                'range': {
+                    'sheetId': sheet_id,
+                    'startRowIndex': first_row_idx,
+                    'endRowIndex': first_row_idx + len(rank_changes),
+                    'startColumnIndex': 0,  # A열
+                    'endColumnIndex': 9     # I열까지 (0-based: A=0, B=1, ..., I=8)
+                },
+                'cell': BACKGROUND_FORMATS[background],
+                'fields': BACKGROUND_FIELDS
+            }
+        })
+    
+    # 같은 색상이 연속되는 구간(run)을 하나의 repeatCell로 묶기
+    if colors is None:
+        colors = [get_rank_change_color(rank_change) for rank_change in rank_changes]
+    run_color = None
+    run_start = 0
+    for idx in range(len(colors) + 1):
+        # 마지막 반복(idx == len(colors))은 남은 구간을 마무리하기 위한 것
+        color = colors[idx] if idx < len(colors) else None
+        if idx < len(colors) and color == run_color:
+            continue
+        
+        if run_color is not None:
+            requests.append({
+                'repeatCell': {
+                    'range': {
+                        'sheetId': sheet_id,
+                        'startRowIndex': first_row_idx + run_start,
+                        'endRowIndex': first_row_idx + idx,
+                        'startColumnIndex': 6,  # G열
+                        'endColumnIndex': 7
+                    },
+                    'cell': TEXT_COLOR_FORMATS[run_color],
+                    'fields': TEXT_COLOR_FIELDS
+                }
+            })
+        
+        run_color = color
+        run_start = idx
+    
+    return requests
+
+def calculate_rank_change(current_rank, previous_rank):
+    """
+    순위 변화를 계산합니다.
+    
+    Args:
+        current_rank: 현재 순위 (int)
+        previous_rank: 이전 순위 (int 또는 None)
+    
+    Returns:
+        순위 변화 문자열: "▲3", "▼2", "(-)", "new"
+    """
+    if previous_rank is None:
+        return "new"
+    
+    try:
+        current = int(current_rank)
+        previous = int(previous_rank)
+        
+        change = previous - current  # 이전 순위 - 현재 순위 (상승하면 양수)
+        
+        if change > 0:
+            return f"▲{change}"
+        elif change < 0:
+            return f"▼{abs(change)}"  # 절댓값 사용
+        else:
+            return "(-)"
+    except (ValueError, TypeError):
+        return "(-)"
+
+# calculate_rank_changes에서 사용하는 값
+RANK_NONE = 0  # 이전 순위 없음 (순위는 1부터 시작하므로 0을 빈 값으로 사용)
+CHANGE_SAME = 0
+CHANGE_UP = 1
+CHANGE_DOWN = -1
+CHANGE_NEW = 2
+
+# 순위상승 표시 문자열/색상을 매번 만들지 않도록 미리 만들어 둔 표
+_CHANGE_LABEL_CACHE_SIZE = 100
+_UP_LABELS = [f"▲{n}" for n in range(_CHANGE_LABEL_CACHE_SIZE)]
+_DOWN_LABELS = [f"▼{n}" for n in range(_CHANGE_LABEL_CACHE_SIZE)]
+_CHANGE_COLORS = {CHANGE_UP: 'red', CHANGE_NEW: 'red', CHANGE_DOWN: 'blue', CHANGE_SAME: 'black'}
+
+def _change_label(code, amount):
+    if code == CHANGE_UP:
+        return _UP_LABELS[amount] if amount < _CHANGE_LABEL_CACHE_SIZE else f"▲{amount}"
+    if code == CHANGE_DOWN:
+        return _DOWN_LABELS[amount] if amount < _CHANGE_LABEL_CACHE_SIZE else f"▼{amount}"
+    if code == CHANGE_NEW:
+        return "new"
+    return "(-)"
+
+def _get_numpy():
+    """numpy는 선택 사항이므로 있으면 사용하고 없으면 None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def calculate_rank_changes(current_ranks, previous_ranks):
+    """
+    여러 키워드의 순위 변화를 한 번에 계산합니다. (calculate_rank_change의 일괄 처리 버전)
+    
+    NumPy 배열을 넘기면 변화량 계산을 배열 연산으로 처리하고, 리스트를 넘기면 순수 파이썬으로 처리합니다.
+    
+    Args:
+        current_ranks: 현재 순위 리스트 또는 배열 (숫자 문자열 허용)
+        previous_ranks: 이전 순위 리스트 또는 배열 (없으면 None 또는 RANK_NONE)
+    
+    Returns:
+        (변화 코드 리스트, 순위상승 문자열 리스트, G열 색상 리스트) 튜플
+        변화 코드: CHANGE_UP, CHANGE_DOWN, CHANGE_SAME, CHANGE_NEW
+        색상: 'red' (▲, new), 'blue' (▼), 'black' ((-))
+    """
+    numpy = _get_numpy() if not isinstance(current_ranks, list) else None
+    if numpy is not None and isinstance(current_ranks, numpy.ndarray):
+        current = numpy.asarray(current_ranks, dtype=numpy.int64)
+        if not isinstance(previous_ranks, numpy.ndarray) or previous_ranks.dtype == object:
+            # 이전 순위가 없는 None은 정수 배열로 바꿀 수 없으므로 RANK_NONE으로 바꿈
+            previous_ranks = [RANK_NONE if rank is None else rank for rank in previous_ranks]
+        previous = numpy.asarray(previous_ranks, dtype=numpy.int64)
+        diff = previous - current  # 이전 순위 - 현재 순위 (상승하면 양수)
+        codes = numpy.sign(diff)
+        codes[previous == RANK_NONE] = CHANGE_NEW
+        codes = codes.tolist()
+        amounts = numpy.abs(diff).tolist()
+    else:
+        codes = []
+        amounts = []
+        for current_rank, previous_rank in zip(current_ranks, previous_ranks):
+            if previous_rank is None or previous_rank == RANK_NONE:
+                codes.append(CHANGE_NEW)
+                amounts.append(0)
+                continue
+            try:
+                change = int(previous_rank) - int(current_rank)
+            except (ValueError, TypeError):
+                change = 0
+            codes.append((change > 0) - (change < 0))
+            amounts.append(abs(change))
+    
+    labels = [_change_label(code, amount) for code, amount in zip(codes, amounts)]
+    colors = [_CHANGE_COLORS[code] for code in codes]
+    return codes, labels, colors
+
+# 전각 문자(！~～) → 반각 ASCII, 전각 공백 → 일반 공백, 폭 없는 문자 → 제거
+_KEYWORD_TRANSLATION = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_KEYWORD_TRANSLATION.update({0x3000: ' ', 0x00A0: ' '})
+_KEYWORD_TRANSLATION.update(dict.fromkeys((0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF)))
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+KEYWORD_CACHE_SIZE = 65536  # normalize_keyword 결과를 기억할 키워드 수
+
+@lru_cache(maxsize=KEYWORD_CACHE_SIZE)
+def normalize_keyword(keyword):
+    """
+    키워드 비교/색인/입력용 키를 만듭니다.
+    (유니코드 NFC 정규화 + 전각 문자 반각 변환 + 폭 없는 문자 제거 + 공백 정리)
+    
+    같은 키워드가 반복해서 들어오므로 결과는 LRU 캐시에 기억합니다.
+    
+    Args:
+        keyword: 키워드 문자열
+    
+    Returns:
+        정규화된 키워드 문자열
+    """
+    if not keyword:
+        return ''
+    keyword = unicodedata.normalize('NFC', keyword).translate(_KEYWORD_TRANSLATION)
+    return _WHITESPACE_PATTERN.sub(' ', keyword).strip()
+
+def benchmark_rank_changes(rows=100000, repeat=5, seed=0):
+    """
+    순위상승 문자열/색상 계산을 행마다 하는 방식과 calculate_rank_changes(리스트, NumPy 배열)로
+    한 번에 하는 방식의 소요 시간을 비교합니다. (각각 repeat번 실행한 최솟값)
+
+    이전 순위는 약 20%를 이전 데이터 없음(리스트는 None, 배열은 RANK_NONE)으로 채웁니다.
+    NumPy 배열은 미리 만들어 두므로 배열 변환 시간은 포함하지 않습니다.
+
+    Returns:
+        {방식: 소요 시간(ms)} 딕셔너리 (NumPy가 없으면 'numpy' 항목 없음)
+    """
+    import random
+    import time
+
+    rng = random.Random(seed)
+    current_ranks = [rng.randint(1, 10) for _ in range(rows)]
+    previous_ranks = [rng.randint(1, 10) if rng.random() >= 0.2 else None for _ in range(rows)]
+
+    def scalar():
+        changes = [calculate_rank_change(current, previous) for current, previous in zip(current_ranks, previous_ranks)]
+        return changes, [get_rank_change_color(change) for change in changes]
+
+    cases = {
+        'scalar': scalar,
+        'list': lambda: calculate_rank_changes(current_ranks, previous_ranks),
+    }
+    numpy = _get_numpy()
+    if numpy is not None:
+        current_array = numpy.array(current_ranks, dtype=numpy.int64)
+        previous_array = numpy.array([RANK_NONE if rank is None else rank for rank in previous_ranks],
+                                     dtype=numpy.int64)
+        cases['numpy'] = lambda: calculate_rank_changes(current_array, previous_array)
+
+    timings = {}
+    for name, func in cases.items():
+        best = None
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best * 1000
+    return timings
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="순위상승 계산 방식별 소요 시간을 비교합니다.")
+    parser.add_argument('--rows', type=int, default=100000, help="행 수 (기본값: 100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="반복 횟수 (최솟값 사용, 기본값: 5)")
+    parser.add_argument('--seed', type=int, default=0, help="데이터 생성용 난수 시드")
+    args = parser.parse_args()
+
+    labels = {
+        'scalar': "행마다 계산 (calculate_rank_change + get_rank_change_color)",
+        'list': "calculate_rank_changes, 리스트",
+        'numpy': "calculate_rank_changes, NumPy 배열",
+    }
+    timings = benchmark_rank_changes(args.rows, args.repeat, args.seed)
+    print(f"{args.rows}행, {args.repeat}회 중 최솟값")
+    for name, elapsed in timings.items():
+        print(f"  {labels[name]:<60} {elapsed:8.1f} ms")
+    if 'numpy' not in timings:
+        print("  (NumPy가 설치되어 있지 않아 배열 방식은 측정하지 않았습니다.)")
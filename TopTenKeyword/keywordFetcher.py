@@ -0,0 +1,237 @@
+"""
+여러 카테고리의 탑텐키워드 페이지를 비동기로 가져와 바로 파싱하는 수집 단계
+
+I열에 HTML을 직접 붙여넣지 않아도, 카테고리ID 목록만으로 페이지를 병렬로 받아
+parse_keywords에 넘깁니다. 연결은 aiohttp 커넥터로 재사용하고, 호스트별 동시 요청 수와
+요청 간 간격(politeness delay)을 제한합니다. 받은 HTML은 모든 페이지를 기다리지 않고
+도착하는 순서대로 파싱 작업자에게 넘깁니다.
+
+aiohttp가 필요합니다: pip install aiohttp
+
+사용법:
+    python keywordFetcher.py --url-template "https://.../{category_id}" 1001 1002 1003
+    python keywordFetcher.py --url-template "..." --header "Cookie: ..." --write 1001 1002
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+from urllib.parse import urlsplit
+
+from keywordCore import parse_keywords
+
+# 기본 수집 설정
+DEFAULT_MAX_PER_HOST = 2       # 호스트별 동시 요청 수
+DEFAULT_DELAY = 1.0            # 같은 호스트에 요청을 보내는 최소 간격 (초)
+DEFAULT_TIMEOUT = 30           # 요청 하나의 제한 시간 (초)
+DEFAULT_TOTAL_CONNECTIONS = 20 # 전체 연결 수 제한
+
+def _get_aiohttp():
+    """aiohttp는 수집 단계에서만 필요하므로 사용할 때 불러옵니다."""
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError("keywordFetcher를 사용하려면 aiohttp가 필요합니다. (pip install aiohttp)")
+    return aiohttp
+
+class _HostThrottle:
+    """호스트 하나의 동시 요청 수와 요청 간 최소 간격을 제한합니다."""
+    def __init__(self, max_concurrency, delay):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.delay = delay
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait_turn(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.delay
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+class KeywordFetcher:
+    """
+    카테고리별 탑텐키워드 페이지 비동기 수집기
+
+    Args:
+        url_template: 카테고리 페이지 URL 템플릿 ({category_id} 자리에 카테고리ID가 들어감)
+            또는 카테고리ID를 받아 URL을 돌려주는 함수 (카테고리마다 호스트가 다를 때)
+        max_per_host: 호스트별 동시 요청 수
+        delay: 같은 호스트에 요청을 보내는 최소 간격 (초)
+        timeout: 요청 하나의 제한 시간 (초)
+        headers: 모든 요청에 붙일 HTTP 헤더 (쿠키 등)
+        total_connections: 전체 연결 수 제한
+    """
+    def __init__(self, url_template, max_per_host=DEFAULT_MAX_PER_HOST, delay=DEFAULT_DELAY,
+                 timeout=DEFAULT_TIMEOUT, headers=None, total_connections=DEFAULT_TOTAL_CONNECTIONS):
+        self.url_template = url_template
+        self.max_per_host = max_per_host
+        self.delay = delay
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.total_connections = total_connections
+
+    def _url(self, category_id):
+        if callable(self.url_template):
+            return self.url_template(category_id)
+        return self.url_template.format(category_id=category_id)
+
+    def _throttle(self, throttles, url):
+        host = urlsplit(url).netloc
+        if host not in throttles:
+            throttles[host] = _HostThrottle(self.max_per_host, self.delay)
+        return throttles[host]
+
+    async def _fetch(self, session, throttles, category_id):
+        url = self._url(category_id)
+        throttle = self._throttle(throttles, url)
+        async with throttle.semaphore:
+            await throttle.wait_turn()
+            try:
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        return category_id, None, f"HTTP {response.status}"
+                    return category_id, await response.text(), None
+            except Exception as e:
+                return category_id, None, str(e) or type(e).__name__
+
+    async def fetch_pages(self, category_ids):
+        """
+        카테고리 페이지를 병렬로 가져와 도착하는 순서대로 돌려줍니다.
+
+        Yields:
+            (카테고리ID, HTML 또는 None, 오류 메시지 또는 None) 튜플
+        """
+        aiohttp = _get_aiohttp()
+        connector = aiohttp.TCPConnector(limit=self.total_connections, limit_per_host=self.max_per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        # 호스트별 제한은 호출마다 새로 만듦 (asyncio 세마포어/락은 만들어진 이벤트 루프에 묶이므로
+        # 같은 수집기를 asyncio.run으로 여러 번 사용해도 동작하도록)
+        throttles = {}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers) as session:
+            tasks = [asyncio.ensure_future(self._fetch(session, throttles, category_id)) for category_id in category_ids]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def fetch_and_parse(self, category_ids, executor=None):
+        """
+        페이지를 받는 즉시 파싱 작업자에게 넘기고, 파싱이 끝나는 순서대로 결과를 돌려줍니다.
+
+        Args:
+            category_ids: 카테고리ID 리스트
+            executor: 파싱에 사용할 Executor (없으면 스레드 풀 사용, 프로세스 풀도 가능)
+
+        Yields:
+            (카테고리ID, 키워드 정보 리스트 또는 None, 오류 메시지 또는 None) 튜플
+        """
+        loop = asyncio.get_running_loop()
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=self.max_per_host)
+
+        async def parse(category_id, html_content):
+            try:
+                results = await loop.run_in_executor(executor, parse_keywords, html_content, category_id)
+                return category_id, results, None
+            except Exception as e:
+                return category_id, None, f"파싱 오류: {e}"
+
+        pending = set()
+        try:
+            async for category_id, html_content, error in self.fetch_pages(category_ids):
+                if error:
+                    yield category_id, None, error
+                    continue
+                pending.add(asyncio.ensure_future(parse(category_id, html_content)))
+                # 이미 끝난 파싱 결과는 바로 내보냄
+                done = {task for task in pending if task.done()}
+                pending -= done
+                for task in done:
+                    yield task.result()
+            for task in asyncio.as_completed(pending):
+                yield await task
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+
+def fetch_keywords(category_ids, url_template, **kwargs):
+    """
+    fetch_and_parse의 동기 버전. 모든 카테고리를 처리한 뒤 결과를 한 번에 돌려줍니다.
+
+    Returns:
+        {카테고리ID: 키워드 정보 리스트 또는 None}, {카테고리ID: 오류 메시지} 튜플
+    """
+    async def run():
+        fetcher = KeywordFetcher(url_template, **kwargs)
+        results = {}
+        errors = {}
+        async for category_id, parsed, error in fetcher.fetch_and_parse(category_ids):
+            results[category_id] = parsed
+            if error:
+                errors[category_id] = error
+        return results, errors
+
+    return asyncio.run(run())
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="카테고리별 탑텐키워드 페이지를 병렬로 가져와 파싱합니다.")
+    parser.add_argument('category_ids', nargs='+', help="카테고리ID 목록")
+    parser.add_argument('--url-template', required=True,
+                        help="페이지 URL 템플릿 ({category_id} 자리에 카테고리ID가 들어감)")
+    parser.add_argument('--max-per-host', type=int, default=DEFAULT_MAX_PER_HOST, help="호스트별 동시 요청 수")
+    parser.add_argument('--delay', type=float, default=DEFAULT_DELAY, help="같은 호스트 요청 간 최소 간격 (초)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="요청 제한 시간 (초)")
+    parser.add_argument('--header', action='append', default=[], help="추가 헤더 ('이름: 값', 여러 번 사용 가능)")
+    parser.add_argument('--write', action='store_true', help="파싱 결과를 탑텐키워드 시트에 입력")
+    args = parser.parse_args()
+
+    headers = {}
+    for header in args.header:
+        name, _, value = header.partition(':')
+        headers[name.strip()] = value.strip()
+
+    start_time = time.time()
+    results, errors = fetch_keywords(
+        args.category_ids, args.url_template,
+        max_per_host=args.max_per_host, delay=args.delay, timeout=args.timeout, headers=headers
+    )
+    elapsed = time.time() - start_time
+
+    for category_id in args.category_ids:
+        if category_id in errors:
+            print(f"✗ {category_id}: {errors[category_id]}")
+        elif not results.get(category_id):
+            print(f"✗ {category_id}: 키워드를 찾을 수 없음")
+        else:
+            category = results[category_id][0].get('카테고리', '')
+            print(f"✓ {category_id} {category}: 키워드 {len(results[category_id])}개")
+    print(f"\n{len(args.category_ids)}개 카테고리 수집 완료 ({elapsed:.1f}초)")
+
+    if args.write:
+        from keywordIndex import KeywordIndex, default_index_path
+        from rankHistory import RankHistoryIndex, default_snapshot_path
+        from toptenKeyword import (
+            SHEET_NAME, SPREADSHEET_ID, ApiKeyDirError, configure_logging, flush_logs, get_sheet_service,
+            write_to_sheet,
+        )
+
+        configure_logging()
+        try:
+            sheet = get_sheet_service()
+        except ApiKeyDirError as e:
+            print(f"오류: {e}")
+            sys.exit(1)
+        history = RankHistoryIndex(default_snapshot_path(SPREADSHEET_ID, SHEET_NAME))
+        keyword_index = KeywordIndex(default_index_path(SPREADSHEET_ID, SHEET_NAME))
+        for category_id in args.category_ids:
+            if results.get(category_id):
+                write_to_sheet(results[category_id], sheet=sheet, history=history, keyword_index=keyword_index)
+        history.save()
+        flush_logs()
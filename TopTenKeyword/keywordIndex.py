@@ -0,0 +1,363 @@
+"""
+키워드 → 카테고리 역색인 (어떤 키워드가 어느 카테고리에서 몇 위인지)
+
+탑텐키워드 이력 시트의 행을 (카테고리ID, 카테고리, 날짜, 순위) 목록으로 키워드별로 모아 두고
+로컬 파일에 저장하므로, 조회할 때는 Sheets를 읽지 않습니다. 키워드는 normalize_keyword로 정규화한 키로 색인합니다.
+
+파일은 두 개입니다.
+    keyword_index_<ID>_<시트>.bin    압축 색인. 키 해시 순으로 정렬된 바이너리 파일을 메모리 매핑(mmap)해서
+                                     조회하는 키의 항목만 읽으므로, 이력이 길어져도 불러오는 시간이 늘지 않습니다.
+    keyword_index_<ID>_<시트>.jsonl  압축 이후에 추가된 행 (write_to_sheet가 행을 추가할 때마다 덧붙임)
+추가된 행이 COMPACT_THRESHOLD개를 넘으면 두 파일을 합쳐 압축 색인을 다시 만들고 .jsonl 파일을 비웁니다.
+
+사용법:
+    python keywordIndex.py 키워드                 # 오늘 이 키워드가 순위에 있는 카테고리
+    python keywordIndex.py 키워드 --date 2024-05-01
+    python keywordIndex.py 키워드 --all           # 전체 이력
+    python keywordIndex.py --sync                 # 시트에서 새로 추가된 행만 가져오기
+    python keywordIndex.py --rebuild              # 시트 전체를 다시 읽어 색인 재생성
+"""
+from datetime import date, datetime
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+
+from keywordCore import normalize_keyword
+from mappedTable import MappedTable, key_hash, replace_mapped_file, sheet_file_path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger('keywordIndex')
+
+# 추가된 행(.jsonl)이 이만큼 쌓이면 압축 색인(.bin)으로 합침
+COMPACT_THRESHOLD = 5000
+
+# 압축 색인 파일 형식 (리틀 엔디언)
+#   헤더: 매직, 버전, watermark, 키 수, 항목 수, 카테고리 수
+#   키: 키 해시, 키 위치, 키 길이, 첫 항목 번호, 항목 수 (키 해시 순 정렬)
+#   항목: 날짜(ordinal), 카테고리 번호, 순위
+#   카테고리: 카테고리ID 위치, 길이, 카테고리명 위치, 길이
+#   문자열: 키와 카테고리 문자열의 UTF-8 바이트를 이어 붙인 영역
+_INDEX_MAGIC = b'TKKI'
+_INDEX_VERSION = 1
+_HEADER = struct.Struct('<4sHxxIIII')
+_KEY = struct.Struct('<QIIII')
+_POSTING = struct.Struct('<IIH')
+_CATEGORY = struct.Struct('<IIII')
+
+def default_index_path(spreadsheet_id, sheet_name):
+    """스프레드시트/이력 시트별 기본 색인 파일 경로 (추가된 행 파일, 압축 색인은 확장자만 .bin)"""
+    return sheet_file_path(script_dir, 'keyword_index', spreadsheet_id, sheet_name, '.jsonl')
+
+class _CompactIndex(MappedTable):
+    """
+    메모리 매핑한 압축 색인 파일. 키 해시로 이진 탐색하므로 파일 전체를 읽지 않습니다.
+    """
+    def _parse_header(self, path):
+        (magic, version, self.watermark, self.count,
+         self.posting_count, self.category_count) = _HEADER.unpack_from(self.mm, 0)
+        self.posting_offset = _HEADER.size + self.count * _KEY.size
+        self.category_offset = self.posting_offset + self.posting_count * _POSTING.size
+        self.key_offset = self.category_offset + self.category_count * _CATEGORY.size
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION or self.key_offset > len(self.mm):
+            raise ValueError(f"키워드 색인 형식이 올바르지 않습니다: {path}")
+        self.categories = {}  # 카테고리 번호 → (카테고리ID, 카테고리명), 읽은 것만 기억
+
+    def _string(self, offset, length):
+        start = self.key_offset + offset
+        return self.mm[start:start + length].decode('utf-8')
+
+    def _record(self, idx):
+        return _KEY.unpack_from(self.mm, _HEADER.size + idx * _KEY.size)
+
+    def _category(self, idx):
+        category = self.categories.get(idx)
+        if category is None:
+            id_offset, id_length, name_offset, name_length = _CATEGORY.unpack_from(
+                self.mm, self.category_offset + idx * _CATEGORY.size
+            )
+            category = (self._string(id_offset, id_length), self._string(name_offset, name_length))
+            self.categories[idx] = category
+        return category
+
+    def _postings(self, first, count):
+        postings = []
+        for idx in range(first, first + count):
+            ordinal, category_idx, rank = _POSTING.unpack_from(self.mm, self.posting_offset + idx * _POSTING.size)
+            category_id, category = self._category(category_idx)
+            postings.append((category_id, category, date.fromordinal(ordinal).isoformat(), rank))
+        return postings
+
+    def get(self, key):
+        """정규화된 키워드의 [(카테고리ID, 카테고리, 날짜, 순위), ...]"""
+        record = self._find(key.encode('utf-8'))
+        return self._postings(record[3], record[4]) if record is not None else []
+
+    def items(self):
+        """모든 (정규화된 키워드, 항목 리스트) 쌍"""
+        for idx in range(self.count):
+            record = self._record(idx)
+            yield self._string(record[1], record[2]), self._postings(record[3], record[4])
+
+class KeywordIndex:
+    """
+    정규화된 키워드 → [(카테고리ID, 카테고리, 날짜, 순위), ...] 역색인 (스레드 안전)
+
+    .jsonl 파일의 각 줄은 [행 번호, 날짜, 카테고리ID, 카테고리, 순위, 키워드] 형식이고,
+    [행 번호] 한 칸짜리 줄은 그 행까지 읽었다는 표시(watermark)입니다.
+
+    Args:
+        path: 추가된 행 파일(.jsonl) 경로. 압축 색인은 같은 이름의 .bin 파일에 저장합니다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.compact_path = os.path.splitext(path)[0] + '.bin'
+        self.compact_index = None
+        self.postings = {}  # 압축 색인 이후에 추가된 행의 항목
+        self.pending = 0    # 압축 색인 이후에 추가된 항목 수
+        self.watermark = 0  # 색인에 반영한 마지막 행 번호
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.compact_path):
+            try:
+                self.compact_index = _CompactIndex(self.compact_path)
+                self.watermark = self.compact_index.watermark
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"압축 색인을 읽을 수 없습니다. (--rebuild로 다시 만드세요): {e}")
+        compact_watermark = self.watermark
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 기록 도중 종료되어 잘린 줄은 무시
+                        continue
+                    # 압축 직후 .jsonl을 비우기 전에 종료된 경우 이미 합친 행은 건너뜀
+                    if record[0] <= compact_watermark:
+                        continue
+                    self.watermark = max(self.watermark, record[0])
+                    if len(record) == 6:
+                        self._add_posting(*record[1:])
+
+        if self.pending >= COMPACT_THRESHOLD:
+            with self.lock:
+                self._compact()
+
+    def _add_posting(self, row_date, category_id, category, rank, keyword):
+        key = normalize_keyword(keyword)
+        if key:
+            self.postings.setdefault(key, []).append((category_id, category, row_date, rank))
+            self.pending += 1
+
+    def _compact(self):
+        """압축 색인과 추가된 행을 합쳐 압축 색인을 다시 만들고 .jsonl 파일을 비웁니다. (lock을 잡은 상태로 호출)"""
+        merged = dict(self.compact_index.items()) if self.compact_index is not None else {}
+        for key, postings in self.postings.items():
+            merged.setdefault(key, []).extend(postings)
+
+        strings = bytearray()
+
+        def add_string(value):
+            encoded = value.encode('utf-8')
+            offset = len(strings)
+            strings.extend(encoded)
+            return offset, len(encoded)
+
+        category_numbers = {}
+        category_records = []
+        keys = []
+        for key, postings in merged.items():
+            key_bytes = key.encode('utf-8')
+            keys.append((key_hash(key_bytes), key, postings))
+        keys.sort(key=lambda item: item[0])
+
+        key_records = []
+        posting_records = []
+        for hash_value, key, postings in keys:
+            key_offset, key_length = add_string(key)
+            key_records.append((hash_value, key_offset, key_length, len(posting_records), len(postings)))
+            for category_id, category, row_date, rank in postings:
+                category_number = category_numbers.get((category_id, category))
+                if category_number is None:
+                    category_number = len(category_records)
+                    category_numbers[(category_id, category)] = category_number
+                    category_records.append(add_string(category_id) + add_string(category))
+                posting_records.append((date.fromisoformat(row_date).toordinal(), category_number, rank))
+
+        def write(f):
+            f.write(_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, self.watermark, len(key_records),
+                                 len(posting_records), len(category_records)))
+            f.write(b''.join(_KEY.pack(*record) for record in key_records))
+            f.write(b''.join(_POSTING.pack(*record) for record in posting_records))
+            f.write(b''.join(_CATEGORY.pack(*record) for record in category_records))
+            f.write(strings)
+
+        replace_mapped_file(self.compact_path, write, self.compact_index)
+        self.compact_index = None
+        open(self.path, 'w').close()
+
+        self.compact_index = _CompactIndex(self.compact_path)
+        self.postings = {}
+        self.pending = 0
+
+    def compact(self):
+        """추가된 행을 압축 색인으로 합칩니다."""
+        with self.lock:
+            if self.pending:
+                self._compact()
+
+    def add_rows(self, rows, start_row):
+        """
+        이력 시트의 행들을 색인에 추가하고 파일에 덧붙입니다.
+
+        Args:
+            rows: 행 값 리스트의 리스트 (A~H열)
+            start_row: rows[0]의 행 번호 (1-based)
+        """
+        if not rows:
+            return
+        lines = []
+        records = []
+        for offset, row in enumerate(rows):
+            if len(row) < 6:  # 최소 A~F열 필요
+                continue
+            try:
+                row_date = datetime.strptime(row[0], '%Y-%m-%d').strftime('%Y-%m-%d')
+                rank = int(row[4])
+            except (ValueError, TypeError):
+                continue
+            record = [start_row + offset, row_date, row[2], row[3], rank, row[5]]
+            records.append(record)
+            lines.append(json.dumps(record, ensure_ascii=False))
+        end_row = start_row + len(rows) - 1
+        lines.append(json.dumps([end_row]))
+
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            for record in records:
+                self._add_posting(*record[1:])
+            self.watermark = max(self.watermark, end_row)
+            if self.pending >= COMPACT_THRESHOLD:
+                self._compact()
+
+    def sync(self, sheet, spreadsheet_id, sheet_name):
+        """
+        watermark 이후에 추가된 행만 시트에서 읽어 색인에 반영합니다.
+
+        Returns:
+            새로 읽은 행 수
+        """
+        start_row = self.watermark + 1
+        data = sheet.values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f"'{sheet_name}'!A{start_row}:H"
+        ).execute()
+        rows = data.get('values', [])
+        self.add_rows(rows, start_row)
+        return len(rows)
+
+    def rebuild(self, sheet, spreadsheet_id, sheet_name):
+        """색인 파일을 지우고 시트 전체를 다시 읽어 만듭니다."""
+        with self.lock:
+            if self.compact_index is not None:
+                self.compact_index.close()
+                self.compact_index = None
+            for path in (self.path, self.compact_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.postings = {}
+            self.pending = 0
+            self.watermark = 0
+        count = self.sync(sheet, spreadsheet_id, sheet_name)
+        self.compact()
+        return count
+
+    def keyword_count(self):
+        """색인된 키워드 수"""
+        with self.lock:
+            if self.compact_index is None:
+                return len(self.postings)
+            new_keys = sum(1 for key in self.postings if not self.compact_index.get(key))
+            return self.compact_index.count + new_keys
+
+    def lookup(self, keyword, date=None):
+        """
+        키워드가 순위에 오른 카테고리 목록을 조회합니다.
+
+        Args:
+            keyword: 키워드 (정규화 전 값도 가능)
+            date: YYYY-MM-DD (없으면 전체 이력)
+
+        Returns:
+            {'카테고리ID', '카테고리', '날짜', '순위'} 딕셔너리 리스트 (최근 날짜, 높은 순위 순)
+        """
+        key = normalize_keyword(keyword)
+        with self.lock:
+            postings = self.compact_index.get(key) if self.compact_index is not None else []
+            postings = postings + self.postings.get(key, [])
+        if date:
+            postings = [posting for posting in postings if posting[2] == date]
+        postings.sort(key=lambda posting: (posting[2], -posting[3]), reverse=True)
+        return [
+            {'카테고리ID': category_id, '카테고리': category, '날짜': row_date, '순위': rank}
+            for category_id, category, row_date, rank in postings
+        ]
+
+if __name__ == "__main__":
+    import argparse
+
+    from toptenKeyword import SPREADSHEET_ID, SHEET_NAME, ApiKeyDirError, configure_logging, get_sheet_service
+
+    parser = argparse.ArgumentParser(description="키워드가 순위에 오른 카테고리를 조회합니다. (Sheets 읽기 없음)")
+    parser.add_argument('keyword', nargs='?', help="조회할 키워드")
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'),
+                        help="조회할 날짜 (YYYY-MM-DD, 기본값: 오늘)")
+    parser.add_argument('--all', action='store_true', help="날짜와 관계없이 전체 이력 조회")
+    parser.add_argument('--sync', action='store_true', help="시트에서 새로 추가된 행만 가져와 색인 갱신")
+    parser.add_argument('--rebuild', action='store_true', help="시트 전체를 다시 읽어 색인 재생성")
+    parser.add_argument('--spreadsheet-id', default=SPREADSHEET_ID)
+    parser.add_argument('--sheet-name', default=SHEET_NAME)
+    args = parser.parse_args()
+    configure_logging()
+
+    start_time = time.perf_counter()
+    index = KeywordIndex(default_index_path(args.spreadsheet_id, args.sheet_name))
+    load_ms = (time.perf_counter() - start_time) * 1000
+
+    if args.rebuild or args.sync:
+        try:
+            sheet = get_sheet_service()
+        except ApiKeyDirError as e:
+            print(f"오류: {e}")
+            sys.exit(1)
+        if args.rebuild:
+            count = index.rebuild(sheet, args.spreadsheet_id, args.sheet_name)
+        else:
+            count = index.sync(sheet, args.spreadsheet_id, args.sheet_name)
+        print(f"색인 갱신: {count}개 행 반영 (마지막 행: {index.watermark})")
+
+    if not args.keyword:
+        if not (args.rebuild or args.sync):
+            parser.print_help()
+            sys.exit(1)
+        sys.exit(0)
+
+    start_time = time.perf_counter()
+    postings = index.lookup(args.keyword, None if args.all else args.date)
+    query_ms = (time.perf_counter() - start_time) * 1000
+
+    if not postings:
+        target = "전체 이력" if args.all else args.date
+        print(f"'{args.keyword}' 키워드가 순위에 오른 카테고리가 없습니다. ({target})")
+    for posting in postings:
+        print(f"{posting['날짜']}  {posting['순위']:>2}위  {posting['카테고리']} ({posting['카테고리ID']})")
+    print(f"\n색인 로드 {load_ms:.1f}ms, 조회 {query_ms:.2f}ms (키워드 {index.keyword_count()}개)")
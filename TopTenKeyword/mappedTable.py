@@ -0,0 +1,100 @@
+"""
+키 해시 순으로 정렬된 바이너리 파일을 메모리 매핑(mmap)해서 읽고 쓰는 공통 도구
+
+rankHistory의 이력 스냅샷과 keywordIndex의 압축 색인이 같은 방식을 사용합니다.
+    헤더 | 레코드 (키 해시 순 정렬) | ... | 키 문자열 영역
+레코드의 앞 세 칸은 (키 해시, 키 위치, 키 길이)이고, 키 위치는 키 문자열 영역 안에서의 위치입니다.
+조회할 때는 키 해시로 이진 탐색하므로 파일 전체를 읽지 않습니다.
+두 파일 모두 스프레드시트와 이력 시트마다 따로 저장합니다. (sheet_file_path)
+"""
+import hashlib
+import mmap
+import os
+import re
+import struct
+
+_UNSAFE_FILE_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+def sheet_file_path(directory, prefix, spreadsheet_id, sheet_name, extension):
+    """
+    스프레드시트와 시트별 데이터 파일 경로 (같은 워크북의 시트마다 따로 저장)
+
+    예: sheet_file_path(d, 'rank_history', 'ID', '0.(DB)쿠팡_탑텐키워드', '.bin')
+        → d/rank_history_ID_0.(DB)쿠팡_탑텐키워드.bin
+    파일 이름에 쓸 수 없는 문자와 공백은 '_'로 바꿉니다.
+    """
+    safe_sheet_name = _UNSAFE_FILE_CHARS.sub('_', sheet_name)
+    return os.path.join(directory, f'{prefix}_{spreadsheet_id}_{safe_sheet_name}{extension}')
+
+def key_hash(key_bytes):
+    """레코드 정렬과 탐색에 사용하는 64비트 키 해시"""
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+
+class MappedTable:
+    """
+    메모리 매핑한 읽기 전용 테이블 파일
+
+    하위 클래스는 _parse_header에서 헤더를 읽어 count(레코드 수)와 key_offset(키 문자열 영역 위치)을
+    정하고, _record(idx)는 (키 해시, 키 위치, 키 길이, ...) 튜플을 돌려줘야 합니다.
+    형식이 맞지 않으면 ValueError 또는 struct.error가 발생합니다.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_header(path)
+        except (struct.error, ValueError):
+            self.mm.close()
+            raise
+
+    def _parse_header(self, path):
+        raise NotImplementedError
+
+    def _record(self, idx):
+        raise NotImplementedError
+
+    def close(self):
+        self.mm.close()
+
+    def _key_at(self, record):
+        start = self.key_offset + record[1]
+        return self.mm[start:start + record[2]]
+
+    def _find(self, key_bytes):
+        """키가 일치하는 레코드 또는 None"""
+        target_hash = key_hash(key_bytes)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._record(mid)[0] < target_hash:
+                low = mid + 1
+            else:
+                high = mid
+        # 해시가 같은 레코드 중 키가 일치하는 것 찾기
+        for idx in range(low, self.count):
+            record = self._record(idx)
+            if record[0] != target_hash:
+                break
+            if self._key_at(record) == key_bytes:
+                return record
+        return None
+
+def replace_mapped_file(path, write, current=None):
+    """
+    임시 파일에 write(f)로 내용을 쓰고 디스크에 반영한 뒤 path 파일을 교체합니다.
+
+    Args:
+        path: 교체할 파일 경로
+        write: 열린 바이너리 파일을 받아 내용을 쓰는 함수
+        current: 지금 path를 매핑하고 있는 MappedTable (있으면 교체 전에 닫음)
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # 사용 중인 매핑을 닫은 뒤 교체 (Windows에서는 매핑된 파일을 덮어쓸 수 없음)
+    if current is not None:
+        current.close()
+    os.replace(tmp_path, path)
@@ -0,0 +1,284 @@
+"""
+여러 스프레드시트(워크북)를 동시에 처리하는 실행기
+
+설정 파일(JSON)에 적힌 대상 워크북/시트 목록을 읽어, 대상마다 별도의 Sheets 클라이언트와
+요청 속도 제한기를 두고 워크북별로 동시에 처리합니다. 같은 워크북을 가리키는 대상은 이력 시트와
+로컬 이력/색인 파일을 함께 쓸 수 있으므로 한 작업자에서 차례대로 처리합니다.
+모든 클라이언트가 같은 인증 사용자로 요청하므로, 대상별 제한 위에 전체 요청 속도 제한(requests_per_minute)을
+한 번 더 적용해 사용자당 할당량을 넘지 않게 합니다.
+HTML 파싱 결과 캐시와 파싱 작업자 풀은 모든 대상이 공유합니다.
+
+사용법:
+    python multiRunner.py targets.json
+
+설정 파일 예시 (targets.example.json 참고):
+    {
+        "parse_workers": 4,
+        "requests_per_minute": 60,
+        "targets": [
+            {
+                "name": "클라이언트A",
+                "spreadsheet_id": "...",
+                "source_sheet_name": "0.(DB)쿠팡카테고리",
+                "sheet_name": "0.(DB)쿠팡_탑텐키워드",
+                "requests_per_minute": 60
+            }
+        ]
+    }
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+
+import toptenKeyword
+from keywordCore import parse_keywords
+from runJournal import RunJournal
+from toptenKeyword import SOURCE_SHEET_NAME, SHEET_NAME, get_sheet_service
+
+logger = logging.getLogger('multiRunner')
+
+# 기본 요청 속도 (Sheets API 기본 할당량: 사용자당 분당 60회 읽기)
+# 대상별 제한과 모든 대상을 합친 전체 제한에 각각 적용
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+# 429(할당량 초과) / 5xx 응답 시 재시도 설정
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+
+class RateLimiter:
+    """
+    요청 간 최소 간격을 보장하는 간단한 속도 제한기 (스레드 안전)
+
+    Args:
+        requests_per_minute: 분당 최대 요청 수 (0 또는 None이면 제한 없음)
+        shared: 여러 제한기가 함께 따르는 상위 제한기 (인증 사용자 전체 할당량 등, 선택)
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, shared=None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.next_time = 0.0
+        self.shared = shared
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """다음 요청을 보내도 될 때까지 대기합니다."""
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+        if self.shared is not None:
+            self.shared.wait()
+
+def _get_status(error):
+    """HttpError 등에서 HTTP 상태 코드를 꺼냅니다. 없으면 None."""
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+class RateLimitedSheet:
+    """
+    Sheets API 서비스 객체를 감싸서 모든 execute() 호출에 속도 제한과 재시도를 적용합니다.
+
+    sheet.values().get(...).execute() 처럼 기존 코드의 호출 방식을 그대로 사용할 수 있습니다.
+    """
+    def __init__(self, target, limiter, retry_base_delay=RETRY_BASE_DELAY):
+        self._target = target
+        self._limiter = limiter
+        self._retry_base_delay = retry_base_delay
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                return _RateLimitedRequest(result, self._limiter, self._retry_base_delay)
+            return RateLimitedSheet(result, self._limiter, self._retry_base_delay)
+
+        return call
+
+class _RateLimitedRequest:
+    """속도 제한과 재시도를 적용해 요청을 실행하는 래퍼"""
+    def __init__(self, request, limiter, retry_base_delay=RETRY_BASE_DELAY):
+        self._request = request
+        self._limiter = limiter
+        self._retry_base_delay = retry_base_delay
+
+    def execute(self, *args, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            self._limiter.wait()
+            try:
+                return self._request.execute(*args, **kwargs)
+            except Exception as e:
+                status = _get_status(e)
+                retryable = status == 429 or (status is not None and status >= 500)
+                if not retryable:
+                    raise
+                if attempt == MAX_RETRIES:
+                    logger.warning(f"  요청 제한/서버 오류({status}) - {MAX_RETRIES}번 재시도했지만 실패했습니다.")
+                    raise
+                delay = self._retry_base_delay * (2 ** attempt)
+                logger.debug(f"  요청 제한/서버 오류({status}) - {delay:.1f}초 후 재시도합니다. ({attempt + 1}/{MAX_RETRIES})")
+                time.sleep(delay)
+
+class SharedParser:
+    """
+    모든 대상이 공유하는 파싱 캐시 + 작업자 풀
+
+    같은 HTML(같은 카테고리ID)은 한 번만 파싱하고, 파싱은 프로세스 풀에서 병렬로 수행합니다.
+    """
+    def __init__(self, executor):
+        self.executor = executor
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, html_content, category_id=''):
+        key = (hashlib.sha1(html_content.encode('utf-8')).hexdigest(), category_id)
+        with self.lock:
+            future = self.cache.get(key)
+            if future is None:
+                future = self.executor.submit(parse_keywords, html_content, category_id)
+                self.cache[key] = future
+        # 결과 딕셔너리는 write_to_sheet에서 수정되므로 복사본을 돌려줌
+        return [dict(result) for result in future.result()]
+
+def load_targets(config_path):
+    """
+    설정 파일에서 실행 설정과 대상 목록을 읽습니다.
+
+    Args:
+        config_path: JSON 설정 파일 경로
+
+    Returns:
+        (설정 딕셔너리, 대상 딕셔너리 리스트)
+
+    같은 워크북의 같은 카테고리 시트/이력 시트를 처리하는 대상이 둘 이상이면
+    같은 행을 중복으로 입력하게 되므로 ValueError를 발생시킵니다.
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    targets = []
+    seen = {}
+    for idx, target in enumerate(config.get('targets', []), start=1):
+        if not target.get('spreadsheet_id'):
+            raise ValueError(f"{idx}번째 대상에 spreadsheet_id가 없습니다.")
+        key = (target['spreadsheet_id'], target.get('source_sheet_name', SOURCE_SHEET_NAME),
+               target.get('sheet_name', SHEET_NAME))
+        if key in seen:
+            raise ValueError(f"{idx}번째 대상이 {seen[key]}번째 대상과 같은 워크북/시트를 처리합니다.")
+        seen[key] = idx
+        targets.append({
+            'name': target.get('name') or target['spreadsheet_id'],
+            'spreadsheet_id': target['spreadsheet_id'],
+            'source_sheet_name': target.get('source_sheet_name', SOURCE_SHEET_NAME),
+            'sheet_name': target.get('sheet_name', SHEET_NAME),
+            'requests_per_minute': target.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+            'html_chunk_size': target.get('html_chunk_size', toptenKeyword.HTML_CHUNK_SIZE),
+        })
+    return config, targets
+
+def run_target(target, sheet, parser, journal):
+    """
+    대상 하나를 처리합니다. (확인 입력 없이 바로 입력)
+
+    Returns:
+        main()의 처리 결과 집계 딕셔너리 또는 None (오류로 중단된 경우)
+    """
+    logger.info(f"[{target['name']}] 처리 시작")
+    try:
+        report = toptenKeyword.main(
+            spreadsheet_id=target['spreadsheet_id'],
+            source_sheet_name=target['source_sheet_name'],
+            sheet_name=target['sheet_name'],
+            sheet=sheet,
+            confirm=False,
+            parse=parser,
+            journal=journal,
+            chunk_size=target['html_chunk_size'],
+            label=target['name'],
+            summary=False
+        )
+    except Exception as e:
+        logger.exception(f"[{target['name']}] 처리 중 오류 발생: {e}")
+        return None
+    logger.info(f"[{target['name']}] 처리 완료")
+    return report
+
+def run_group(group, parser, journal):
+    """
+    같은 워크북을 가리키는 대상들을 차례대로 처리합니다.
+
+    Returns:
+        대상 순서대로의 run_target 결과 리스트
+    """
+    return [run_target(target, sheet, parser, journal) for target, sheet in group]
+
+def run_all(config_path):
+    """
+    설정 파일의 모든 대상을 워크북별로 동시에 처리합니다.
+    """
+    config, targets = load_targets(config_path)
+    if not targets:
+        logger.warning("처리할 대상이 없습니다.")
+        return
+
+    # 모든 클라이언트가 같은 인증 사용자로 요청하므로 전체 요청 속도를 할당량에 맞춰 한 번 더 제한
+    quota_limiter = RateLimiter(config.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE))
+
+    # 인증 토큰 갱신이 겹치지 않도록 클라이언트는 메인 스레드에서 대상마다 하나씩 생성
+    groups = {}
+    for target in targets:
+        limiter = RateLimiter(target['requests_per_minute'], shared=quota_limiter)
+        sheet = RateLimitedSheet(get_sheet_service(), limiter)
+        groups.setdefault(target['spreadsheet_id'], []).append((target, sheet))
+
+    # 진행 상황 저널은 모든 대상이 공유 (행 키에 스프레드시트 ID가 포함됨)
+    journal = RunJournal()
+    journal.compact()
+
+    logger.info(f"총 {len(targets)}개의 대상을 워크북 {len(groups)}개로 나눠 동시에 처리합니다.")
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=config.get('parse_workers')) as parse_pool:
+        parser = SharedParser(parse_pool)
+        with ThreadPoolExecutor(max_workers=len(groups)) as target_pool:
+            futures = [
+                target_pool.submit(run_group, group, parser, journal)
+                for group in groups.values()
+            ]
+            reports = [report for future in futures for report in future.result()]
+
+    # 모든 대상의 결과를 하나의 보고로 합쳐서 출력
+    report = toptenKeyword.merge_reports([report for report in reports if report is not None])
+    report['elapsed'] = time.time() - start_time
+    report['targets'] = (sum(1 for report in reports if report is not None), len(targets))
+    toptenKeyword.log_report(report)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="여러 스프레드시트(워크북)를 동시에 처리합니다.")
+    parser.add_argument('config_path', help="설정 파일 경로 (targets.example.json 참고)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true', help="경고/오류와 최종 보고만 출력")
+    verbosity.add_argument('-v', '--verbose', action='store_true', help="키워드별 상세 정보까지 출력")
+    args = parser.parse_args()
+
+    toptenKeyword.configure_logging('quiet' if args.quiet else 'verbose' if args.verbose else 'normal')
+    try:
+        run_all(args.config_path)
+    except toptenKeyword.ApiKeyDirError as e:
+        logger.error(f"오류: {e}")
+        toptenKeyword.flush_logs()
+        sys.exit(1)
@@ -0,0 +1,287 @@
+"""
+탑텐키워드 이력 시트의 순위 인덱스
+
+(카테고리ID, 키워드)별로 날짜별 순위를 메모리에 들고 있어서, 이전 순위를 조회할 때마다
+A:H 전체를 다시 내려받지 않아도 되게 합니다. 이미 읽은 행 수(watermark)를 기억하므로
+refresh()는 그 이후에 추가된 행만 가져옵니다.
+키워드는 normalize_keyword로 정규화한 키로 저장하고 조회합니다.
+
+스냅샷 파일 경로를 주면 (카테고리ID, 키워드)별 최근 두 날짜의 순위와 watermark를 바이너리 파일로
+저장해 두고, 다음 실행 때 파일을 메모리 매핑(mmap)해서 필요한 키만 찾아 읽습니다.
+그래서 프로세스를 새로 시작해도 이력 길이와 관계없이 스냅샷 이후에 추가된 행만 시트에서 가져옵니다.
+"""
+from datetime import date, datetime
+import hashlib
+import logging
+import os
+import struct
+
+from keywordCore import normalize_keyword
+from mappedTable import MappedTable, key_hash, replace_mapped_file, sheet_file_path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger('rankHistory')
+
+# 스냅샷 파일 형식 (리틀 엔디언)
+#   헤더: 매직, 버전, watermark, 레코드 수, watermark 행의 지문(8바이트)
+#   레코드: 키 해시, 키 위치, 키 길이, 최근 날짜, 그 이전 날짜, 최근 순위, 그 이전 순위 (키 해시 순 정렬)
+#   키: "카테고리ID\x1f정규화된 키워드" UTF-8 바이트를 이어 붙인 영역
+_SNAPSHOT_MAGIC = b'TKRS'
+_SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<4sHxxII8s')
+_RECORD = struct.Struct('<QIIIIHH')
+_KEY_SEPARATOR = '\x1f'
+_MAX_RANK = 0xFFFF
+
+def default_snapshot_path(spreadsheet_id, sheet_name):
+    """스프레드시트와 이력 시트별 기본 이력 스냅샷 파일 경로"""
+    return sheet_file_path(script_dir, 'rank_history', spreadsheet_id, sheet_name, '.bin')
+
+def _key_bytes(category_id, keyword):
+    return f"{category_id}{_KEY_SEPARATOR}{keyword}".encode('utf-8')
+
+def _row_fingerprint(row):
+    """
+    행 하나의 지문. 스냅샷의 watermark 행이 시트에서 그대로인지 확인하는 데 사용합니다.
+    (입력한 값과 시트에서 다시 읽은 값의 표기 차이를 줄이기 위해 날짜/순위/키워드는 정규화해서 비교)
+    """
+    cells = [str(cell).strip() for cell in row]
+    if len(cells) >= 6:
+        try:
+            cells[0] = datetime.strptime(cells[0], '%Y-%m-%d').strftime('%Y-%m-%d')
+            cells[4] = str(int(cells[4]))
+        except ValueError:
+            pass
+        cells = [cells[0], cells[2], cells[4], normalize_keyword(cells[5])]
+    return hashlib.blake2b(_KEY_SEPARATOR.join(cells).encode('utf-8'), digest_size=8).digest()
+
+class _RankSnapshot(MappedTable):
+    """
+    메모리 매핑한 스냅샷 파일. 키 해시로 이진 탐색하므로 파일 전체를 읽지 않습니다.
+    """
+    def _parse_header(self, path):
+        magic, version, self.watermark, self.count, self.last_row_digest = _HEADER.unpack_from(self.mm, 0)
+        self.key_offset = _HEADER.size + self.count * _RECORD.size
+        if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION or self.key_offset > len(self.mm):
+            raise ValueError(f"이력 스냅샷 형식이 올바르지 않습니다: {path}")
+
+    def _record(self, idx):
+        return _RECORD.unpack_from(self.mm, _HEADER.size + idx * _RECORD.size)
+
+    @staticmethod
+    def _dates(record):
+        _, _, _, date1, date2, rank1, rank2 = record
+        dates = {}
+        if date1:
+            dates[date.fromordinal(date1).isoformat()] = rank1
+        if date2:
+            dates[date.fromordinal(date2).isoformat()] = rank2
+        return dates
+
+    def get(self, category_id, keyword):
+        """
+        Returns:
+            {날짜: 순위} (최대 두 날짜) 또는 None
+        """
+        record = self._find(_key_bytes(category_id, keyword))
+        return self._dates(record) if record is not None else None
+
+    def items(self):
+        """모든 ((카테고리ID, 키워드), {날짜: 순위}) 쌍"""
+        for idx in range(self.count):
+            record = self._record(idx)
+            category_id, _, keyword = self._key_at(record).decode('utf-8').partition(_KEY_SEPARATOR)
+            yield (category_id, keyword), self._dates(record)
+
+class RankHistoryIndex:
+    """
+    이력 시트의 (카테고리ID, 정규화된 키워드) → {날짜: 순위} 인덱스
+
+    Args:
+        path: 이력 스냅샷 파일 경로 (없으면 스냅샷 없이 메모리에서만 사용)
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.ranks = {}
+        self.watermark = 0  # 지금까지 읽은 행 수 (= 마지막으로 읽은 행 번호)
+        self.snapshot = None
+        self.last_row_digest = b''
+        self.verified = True  # 스냅샷의 watermark 행이 시트와 같은지 확인했는지
+        self.dirty = False    # 스냅샷 이후에 추가된 행이 있는지
+        if path:
+            self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            self.snapshot = _RankSnapshot(self.path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"이력 스냅샷을 읽을 수 없어 전체 이력을 다시 읽습니다: {e}")
+            return
+        self.watermark = self.snapshot.watermark
+        self.last_row_digest = self.snapshot.last_row_digest
+        self.verified = self.watermark == 0
+
+    def _reset(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        self.ranks = {}
+        self.watermark = 0
+        self.last_row_digest = b''
+        self.verified = True
+
+    def add_rows(self, rows):
+        """
+        이력 시트의 행(A~H열 값 리스트)들을 인덱스에 추가합니다.
+        watermark 다음 행부터 순서대로 들어온다고 가정합니다.
+
+        Args:
+            rows: 행 값 리스트의 리스트
+        """
+        for row in rows:
+            self.watermark += 1
+            if len(row) < 7:  # 최소 A~G열 필요
+                continue
+
+            row_date = row[0]         # A열: 날짜
+            row_category_id = row[2]  # C열: 카테고리ID
+            row_rank = row[4]         # E열: 순위
+            row_keyword = row[5]      # F열: 키워드
+
+            try:
+                # 2024-1-5 같은 표기도 2024-01-05로 맞춰서 저장
+                row_date = datetime.strptime(row_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+                rank = int(row_rank)
+            except (ValueError, TypeError):
+                continue
+
+            dates = self.ranks.setdefault((row_category_id, normalize_keyword(row_keyword)), {})
+            # 같은 날짜가 여러 번 있으면 먼저 입력된 행의 순위를 사용
+            dates.setdefault(row_date, rank)
+
+        if rows:
+            self.last_row_digest = _row_fingerprint(rows[-1])
+            self.dirty = True
+
+    def refresh(self, sheet, spreadsheet_id, sheet_name):
+        """
+        watermark 이후에 추가된 행만 시트에서 읽어 인덱스를 갱신합니다.
+        스냅샷을 불러온 뒤 처음 갱신할 때는 watermark 행도 함께 읽어, 그 사이에 시트의 행이
+        지워지거나 바뀌었으면 스냅샷을 버리고 전체 이력을 다시 읽습니다.
+
+        Args:
+            sheet: Sheets API 서비스 객체
+            spreadsheet_id: 스프레드시트 ID
+            sheet_name: 탑텐키워드 시트 이름
+
+        Returns:
+            새로 읽은 행 수
+        """
+        if not self.verified:
+            data = sheet.values().get(
+                spreadsheetId=spreadsheet_id,
+                range=f"'{sheet_name}'!A{self.watermark}:H"
+            ).execute()
+            rows = data.get('values', [])
+            self.verified = True
+            if rows and _row_fingerprint(rows[0]) == self.last_row_digest:
+                self.add_rows(rows[1:])
+                return len(rows) - 1
+            logger.warning("이력 스냅샷 이후에 시트가 바뀌어 전체 이력을 다시 읽습니다.")
+            self._reset()
+
+        data = sheet.values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f"'{sheet_name}'!A{self.watermark + 1}:H"
+        ).execute()
+        rows = data.get('values', [])
+        self.add_rows(rows)
+        return len(rows)
+
+    def _get_dates(self, category_id, keyword):
+        key = (category_id, normalize_keyword(keyword))
+        dates = self.ranks.get(key)
+        if self.snapshot is not None:
+            stored = self.snapshot.get(*key)
+            if stored:
+                # 스냅샷의 행이 먼저 입력된 행이므로 같은 날짜면 스냅샷의 순위를 사용
+                dates = {**(dates or {}), **stored}
+        return dates
+
+    def get_previous_rank(self, category_id, keyword, current_date):
+        """
+        같은 카테고리ID와 키워드의, 현재 날짜보다 이전 날짜 중 가장 최근 순위를 찾습니다.
+        (스냅샷에는 키마다 최근 두 날짜만 있으므로, 그보다 오래된 날짜를 기준으로 한 조회에는 맞지 않습니다.)
+
+        Args:
+            category_id: 카테고리ID
+            keyword: 키워드 (정규화 전 값도 가능)
+            current_date: 현재 날짜 (YYYY-MM-DD 형식)
+
+        Returns:
+            이전 순위 (int) 또는 None (이전 데이터가 없는 경우)
+        """
+        dates = self._get_dates(category_id, keyword)
+        if not dates:
+            return None
+        try:
+            current_date = datetime.strptime(current_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except (ValueError, TypeError):
+            return None
+        # YYYY-MM-DD 형식은 문자열 비교가 날짜 비교와 같음
+        previous_dates = [row_date for row_date in dates if row_date < current_date]
+        if not previous_dates:
+            return None
+        return dates[max(previous_dates)]
+
+    def save(self, path=None):
+        """
+        (카테고리ID, 키워드)별 최근 두 날짜의 순위와 watermark를 스냅샷 파일에 저장하고,
+        저장한 스냅샷을 다시 메모리 매핑해 사용합니다. 새로 추가된 행이 없으면 저장하지 않습니다.
+
+        Args:
+            path: 저장할 경로 (없으면 생성할 때 준 경로)
+
+        Returns:
+            저장했으면 True
+        """
+        path = path or self.path
+        if not path or not self.dirty or not self.verified:
+            return False
+
+        merged = dict(self.snapshot.items()) if self.snapshot is not None else {}
+        for key, dates in self.ranks.items():
+            stored = merged.setdefault(key, {})
+            for row_date, rank in dates.items():
+                stored.setdefault(row_date, rank)
+
+        records = []
+        key_blob = bytearray()
+        for (category_id, keyword), dates in merged.items():
+            latest = sorted(dates.items(), reverse=True)[:2]
+            ordinals = [date.fromisoformat(row_date).toordinal() for row_date, _ in latest] + [0, 0]
+            ranks = [min(max(rank, 0), _MAX_RANK) for _, rank in latest] + [0, 0]
+            key_bytes = _key_bytes(category_id, keyword)
+            records.append((key_hash(key_bytes), len(key_blob), len(key_bytes),
+                            ordinals[0], ordinals[1], ranks[0], ranks[1]))
+            key_blob += key_bytes
+        records.sort()
+
+        def write(f):
+            f.write(_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, self.watermark, len(records),
+                                 self.last_row_digest))
+            for record in records:
+                f.write(_RECORD.pack(*record))
+            f.write(key_blob)
+
+        replace_mapped_file(path, write, self.snapshot)
+        self.snapshot = None
+
+        self.path = path
+        self.snapshot = _RankSnapshot(path)
+        self.ranks = {}
+        self.dirty = False
+        return True
@@ -0,0 +1,126 @@
+"""
+진행 상황 저널 (write-ahead journal)
+
+카테고리 행마다 처리 단계를 로컬 파일(JSON Lines)에 기록해 두고,
+프로세스가 중간에 종료되어도 다음 실행에서 마지막으로 완료한 단계부터 이어서 진행할 수 있게 합니다.
+
+단계:
+    parsed    - HTML 파싱 완료 (파싱 결과 저장)
+    appended  - 탑텐키워드 시트에 행 추가 완료 (추가된 범위 저장)
+    formatted - G열 색상/배경색 적용 완료
+    logged    - J열 처리 로그 작성 완료 (저널에서 제거)
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_JOURNAL_PATH = os.path.join(script_dir, 'toptenKeyword_journal.jsonl')
+
+def make_row_key(spreadsheet_id, source_sheet_name, row_number):
+    """
+    저널에서 사용할 카테고리 행 키를 만듭니다.
+    """
+    return f"{spreadsheet_id}|{source_sheet_name}|{row_number}"
+
+def html_digest(html_content):
+    """
+    I열 HTML의 해시값. 이전 실행 이후 HTML이 바뀌었는지 확인하는 데 사용합니다.
+    """
+    return hashlib.sha1(html_content.encode('utf-8')).hexdigest()
+
+class RunJournal:
+    """
+    카테고리 행별 처리 단계를 기록하는 저널 (스레드 안전)
+
+    기록은 항상 파일 끝에 한 줄씩 추가하고 fsync하므로, 기록 도중 종료되더라도
+    마지막 한 줄만 손상되고 이전 기록은 그대로 남습니다.
+    """
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """저널 파일을 읽어 행별 최신 상태를 복원합니다."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for line in content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 기록 도중 종료되어 잘린 줄은 무시
+                continue
+            self._apply(record)
+        # 잘린 줄 뒤에 새 기록이 이어 붙지 않도록 줄바꿈으로 마무리
+        if content and not content.endswith('\n'):
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n')
+
+    def _apply(self, record):
+        key = record['key']
+        state = record['state']
+        if state == 'logged':
+            self.entries.pop(key, None)
+        elif state == 'parsed':
+            # 새로 파싱한 경우 이전 단계 정보는 모두 버림
+            self.entries[key] = record
+        else:
+            entry = dict(self.entries.get(key, {}))
+            entry.update(record)
+            self.entries[key] = entry
+
+    def get(self, key):
+        """
+        행의 마지막 기록을 반환합니다.
+
+        Returns:
+            기록 딕셔너리 (state 포함) 또는 None (진행 중인 기록이 없는 경우)
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def record(self, key, state, **data):
+        """
+        행의 처리 단계를 기록합니다.
+
+        Args:
+            key: 행 키 (make_row_key)
+            state: 'parsed', 'appended', 'formatted', 'logged' 중 하나
+            **data: 함께 저장할 정보 (파싱 결과, 추가된 범위 등)
+        """
+        record = {'key': key, 'state': state, 'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        record.update(data)
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(record)
+
+    def compact(self):
+        """
+        완료된 행의 기록을 지우고 진행 중인 행의 최신 상태만 남기도록 파일을 다시 씁니다.
+        """
+        with self.lock:
+            if not self.entries:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,7 @@
+"""
+TopTenKeyword 모듈은 같은 폴더에서 `import keywordCore`처럼 불러오므로 상위 폴더를 sys.path에 추가합니다.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,109 @@
+"""
+keywordCore.build_format_requests가 만드는 batchUpdate 요청 페이로드와 calculate_rank_changes 테스트
+"""
+import pytest
+
+from keywordCore import (
+    BACKGROUND_FIELDS,
+    BACKGROUND_FORMATS,
+    CHANGE_DOWN,
+    CHANGE_NEW,
+    CHANGE_SAME,
+    CHANGE_UP,
+    TEXT_COLOR_FIELDS,
+    TEXT_COLOR_FORMATS,
+    build_format_requests,
+    calculate_rank_changes,
+)
+
+SHEET_ID = 123
+
+def text_color_runs(requests):
+    """G열 텍스트 색상 요청을 (시작 행 인덱스, 끝 행 인덱스, 색상) 튜플 리스트로 바꿉니다."""
+    runs = []
+    for request in requests:
+        repeat_cell = request['repeatCell']
+        if repeat_cell['fields'] != TEXT_COLOR_FIELDS:
+            continue
+        cell_range = repeat_cell['range']
+        assert cell_range['sheetId'] == SHEET_ID
+        assert (cell_range['startColumnIndex'], cell_range['endColumnIndex']) == (6, 7)
+        color = next(name for name, fmt in TEXT_COLOR_FORMATS.items() if fmt == repeat_cell['cell'])
+        runs.append((cell_range['startRowIndex'], cell_range['endRowIndex'], color))
+    return runs
+
+def background_requests(requests):
+    return [request['repeatCell'] for request in requests if request['repeatCell']['fields'] == BACKGROUND_FIELDS]
+
+def test_empty_list_makes_no_requests():
+    assert build_format_requests(SHEET_ID, 5, []) == []
+    assert build_format_requests(SHEET_ID, 5, [], background='gray') == []
+
+def test_same_color_rows_are_merged_into_one_run():
+    requests = build_format_requests(SHEET_ID, 2, ['▲3', 'new', '▲1', '▼2', '▼5', '(-)'])
+    assert text_color_runs(requests) == [
+        (1, 4, 'red'),   # ▲3, new, ▲1
+        (4, 6, 'blue'),  # ▼2, ▼5
+        (6, 7, 'black'),
+    ]
+
+def test_uncolored_value_splits_a_run():
+    requests = build_format_requests(SHEET_ID, 1, ['▲1', '', '▲2', '▲3', '알 수 없음', 'new'])
+    assert text_color_runs(requests) == [
+        (0, 1, 'red'),
+        (2, 4, 'red'),
+        (5, 6, 'red'),
+    ]
+
+def test_all_uncolored_values_make_no_text_requests():
+    assert build_format_requests(SHEET_ID, 1, ['', '', '']) == []
+
+def test_start_row_is_converted_to_zero_based_index():
+    requests = build_format_requests(SHEET_ID, 101, ['▼1', '▼1'])
+    assert text_color_runs(requests) == [(100, 102, 'blue')]
+
+def test_gray_background_covers_columns_a_to_i_of_all_rows():
+    requests = build_format_requests(SHEET_ID, 10, ['▲1', '', '▼1'], background='gray')
+    backgrounds = background_requests(requests)
+    assert backgrounds == [{
+        'range': {
+            'sheetId': SHEET_ID,
+            'startRowIndex': 9,
+            'endRowIndex': 12,
+            'startColumnIndex': 0,
+            'endColumnIndex': 9,
+        },
+        'cell': BACKGROUND_FORMATS['gray'],
+        'fields': BACKGROUND_FIELDS,
+    }]
+    # 배경색과 텍스트 색상이 한 번의 batchUpdate에 함께 담김
+    assert len(requests) == 3
+
+def test_white_background():
+    backgrounds = background_requests(build_format_requests(SHEET_ID, 3, ['new'], background='white'))
+    assert [background['cell'] for background in backgrounds] == [BACKGROUND_FORMATS['white']]
+
+def test_no_background():
+    requests = build_format_requests(SHEET_ID, 3, ['new', '(-)'], background=None)
+    assert background_requests(requests) == []
+    assert text_color_runs(requests) == [(2, 3, 'red'), (3, 4, 'black')]
+
+def test_precomputed_colors_are_used_as_given():
+    # colors를 넘기면 순위상승 문자열로 다시 계산하지 않음
+    requests = build_format_requests(SHEET_ID, 1, ['▲1', '▲2', '▼1'], colors=['blue', 'blue', None])
+    assert text_color_runs(requests) == [(0, 2, 'blue')]
+
+def test_colors_from_calculate_rank_changes_match_computed_colors():
+    _, rank_changes, colors = calculate_rank_changes([1, 2, 3, 4], [3, None, 3, 1])
+    assert (build_format_requests(SHEET_ID, 2, rank_changes, colors=colors)
+            == build_format_requests(SHEET_ID, 2, rank_changes))
+
+def test_numpy_path_accepts_none_previous_ranks():
+    numpy = pytest.importorskip('numpy')
+    current = [1, 2, 3, 4]
+    previous = [3, None, 3, 1]
+    expected = ([CHANGE_UP, CHANGE_NEW, CHANGE_SAME, CHANGE_DOWN], ['▲2', 'new', '(-)', '▼3'],
+                ['red', 'red', 'black', 'blue'])
+    assert calculate_rank_changes(current, previous) == expected
+    assert calculate_rank_changes(numpy.array(current), previous) == expected
+    assert calculate_rank_changes(numpy.array(current), numpy.array(previous, dtype=object)) == expected
@@ -0,0 +1,148 @@
+"""
+keywordFetcher.KeywordFetcher 테스트 (로컬 HTTP 스텁 서버 사용)
+
+스텁은 /category/<카테고리ID> 경로로 fakeSheets.make_keyword_html 페이지를 돌려주고,
+FIXTURE_PAGES에 없는 카테고리는 404를 돌려줍니다. 호스트(Host 헤더)별 동시 요청 수와
+요청 시작 시각, 전체 동시 요청 수를 기록해 동시성 제한과 요청 간격을 확인합니다.
+"""
+import asyncio
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('bs4')
+
+from fakeSheets import make_keyword_html
+from keywordFetcher import KeywordFetcher
+
+FIXTURE_PAGES = {
+    '1001': ('여성패션', ['원피스', '블라우스', '니트']),
+    '1002': ('남성패션', ['셔츠', '청바지']),
+    '1003': ('가전디지털', ['무선 이어폰', '노트북', '모니터', '키보드']),
+    '1004': ('식품', ['생수']),
+    '1005': ('뷰티', ['선크림', '립밤']),
+    '1006': ('스포츠', ['요가매트']),
+}
+MISSING_ID = '9999'
+RESPONSE_DELAY = 0.15  # 동시 요청이 겹치도록 응답을 늦춤
+
+class StubServer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = defaultdict(int)
+        self.peak = defaultdict(int)
+        self.total_active = 0
+        self.total_peak = 0
+        self.start_times = defaultdict(list)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host = self.headers.get('Host', '').split(':')[0]
+                with stub.lock:
+                    stub.active[host] += 1
+                    stub.peak[host] = max(stub.peak[host], stub.active[host])
+                    stub.total_active += 1
+                    stub.total_peak = max(stub.total_peak, stub.total_active)
+                    stub.start_times[host].append(time.monotonic())
+                try:
+                    time.sleep(RESPONSE_DELAY)
+                    category_id = self.path.rsplit('/', 1)[-1]
+                    if category_id not in FIXTURE_PAGES:
+                        self.send_error(404)
+                        return
+                    body = make_keyword_html(*FIXTURE_PAGES[category_id]).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub.lock:
+                        stub.active[host] -= 1
+                        stub.total_active -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+def collect(fetcher, category_ids):
+    async def run():
+        return [item async for item in fetcher.fetch_and_parse(category_ids)]
+    return asyncio.run(run())
+
+def test_parsed_output_and_error_reporting(stub):
+    fetcher = KeywordFetcher(f"http://127.0.0.1:{stub.port}/category/{{category_id}}", delay=0)
+    results = {category_id: (parsed, error)
+               for category_id, parsed, error in collect(fetcher, list(FIXTURE_PAGES) + [MISSING_ID])}
+
+    assert set(results) == set(FIXTURE_PAGES) | {MISSING_ID}
+    assert results[MISSING_ID] == (None, 'HTTP 404')
+
+    for category_id, (category, keywords) in FIXTURE_PAGES.items():
+        parsed, error = results[category_id]
+        assert error is None
+        assert [result['키워드'] for result in parsed] == keywords
+        assert [result['순위'] for result in parsed] == [str(rank) for rank in range(1, len(keywords) + 1)]
+        assert {result['카테고리'] for result in parsed} == {category}
+        assert {result['카테고리ID'] for result in parsed} == {category_id}
+
+def test_per_host_concurrency_limit(stub):
+    fetcher = KeywordFetcher(f"http://127.0.0.1:{stub.port}/category/{{category_id}}",
+                             max_per_host=2, delay=0)
+    collect(fetcher, list(FIXTURE_PAGES))
+    assert stub.peak['127.0.0.1'] == 2
+
+def test_hosts_are_throttled_separately(stub):
+    # 수집기 하나가 카테고리를 두 호스트 이름으로 나눠 요청하면 호스트마다 따로 제한됨
+    ids = list(FIXTURE_PAGES)
+    hosts = {category_id: ('127.0.0.1' if idx % 2 else 'localhost') for idx, category_id in enumerate(ids)}
+    fetcher = KeywordFetcher(lambda category_id: f"http://{hosts[category_id]}:{stub.port}/category/{category_id}",
+                             max_per_host=1, delay=0)
+    results = collect(fetcher, ids)
+
+    assert all(error is None for _, _, error in results)
+    assert stub.peak['127.0.0.1'] == 1
+    assert stub.peak['localhost'] == 1
+    # 호스트 하나의 제한이 다른 호스트 요청을 막지 않음
+    assert stub.total_peak == 2
+
+def test_fetcher_can_be_reused_across_event_loops(stub):
+    fetcher = KeywordFetcher(f"http://127.0.0.1:{stub.port}/category/{{category_id}}", delay=0)
+    ids = list(FIXTURE_PAGES)
+    first = collect(fetcher, ids[:3])
+    second = collect(fetcher, ids[3:])
+    assert all(error is None for _, _, error in first + second)
+    assert sorted(category_id for category_id, _, _ in first + second) == sorted(ids)
+
+def test_politeness_delay_spaces_request_starts(stub):
+    delay = 0.1
+    fetcher = KeywordFetcher(f"http://127.0.0.1:{stub.port}/category/{{category_id}}",
+                             max_per_host=4, delay=delay)
+    collect(fetcher, list(FIXTURE_PAGES))
+
+    start_times = sorted(stub.start_times['127.0.0.1'])
+    assert len(start_times) == len(FIXTURE_PAGES)
+    gaps = [later - earlier for earlier, later in zip(start_times, start_times[1:])]
+    # 스케줄링 오차를 감안해 약간의 여유를 둠
+    assert min(gaps) >= delay * 0.8
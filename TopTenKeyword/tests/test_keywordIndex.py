@@ -0,0 +1,56 @@
+"""
+keywordIndex.KeywordIndex 테스트 (압축 색인 + 추가된 행 파일)
+"""
+import keywordIndex
+from keywordIndex import KeywordIndex, default_index_path
+
+def make_rows(day, category_id, category, keywords):
+    return [[day, '', category_id, category, str(rank), keyword, '', '']
+            for rank, keyword in enumerate(keywords, start=1)]
+
+def test_lookup_merges_compact_index_and_new_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(keywordIndex, 'COMPACT_THRESHOLD', 4)
+    path = str(tmp_path / 'keyword_index_test.jsonl')
+
+    index = KeywordIndex(path)
+    index.add_rows(make_rows('2024-05-01', '1001', '여성패션', ['원피스', '니트', '블라우스', '셔츠']), 2)
+    # 임계값을 넘어 압축 색인으로 합쳐지고 .jsonl은 비워짐
+    assert index.compact_index is not None and index.pending == 0
+    assert (tmp_path / 'keyword_index_test.jsonl').read_text() == ''
+
+    index.add_rows(make_rows('2024-05-02', '1002', '남성패션', ['셔츠', '청바지']), 6)
+    assert index.pending == 2
+
+    reloaded = KeywordIndex(path)
+    assert reloaded.watermark == 7
+    assert reloaded.keyword_count() == 5
+    assert reloaded.lookup('셔츠') == [
+        {'카테고리ID': '1002', '카테고리': '남성패션', '날짜': '2024-05-02', '순위': 1},
+        {'카테고리ID': '1001', '카테고리': '여성패션', '날짜': '2024-05-01', '순위': 4},
+    ]
+    assert reloaded.lookup('셔츠', '2024-05-01')[0]['카테고리'] == '여성패션'
+    # 정규화 전 값(전각 공백 등)으로도 조회됨
+    assert reloaded.lookup('　원피스 ')[0]['순위'] == 1
+    assert reloaded.lookup('없는키워드') == []
+
+def test_rows_already_compacted_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(keywordIndex, 'COMPACT_THRESHOLD', 2)
+    path = str(tmp_path / 'keyword_index_test.jsonl')
+    rows = make_rows('2024-05-01', '1001', '여성패션', ['원피스', '니트'])
+
+    index = KeywordIndex(path)
+    index.add_rows(rows, 2)
+    # 압축 후 .jsonl을 비우기 전에 종료된 경우처럼 같은 행이 남아 있어도 중복되지 않음
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[2, "2024-05-01", "1001", "여성패션", 1, "원피스"]\n[3]\n')
+
+    reloaded = KeywordIndex(path)
+    assert reloaded.pending == 0
+    assert len(reloaded.lookup('원피스')) == 1
+
+def test_default_path_is_per_sheet():
+    first = default_index_path('ID', '0.(DB)쿠팡_탑텐키워드')
+    second = default_index_path('ID', '다른 이력/시트')
+    assert first != second
+    assert first.endswith('keyword_index_ID_0.(DB)쿠팡_탑텐키워드.jsonl')
+    assert second.endswith('keyword_index_ID_다른_이력_시트.jsonl')
@@ -0,0 +1,159 @@
+"""
+toptenKeyword.main() 테스트 (fakeSheets.FakeSpreadsheets 백엔드 사용)
+
+메서드마다 첫 요청을 429로 실패시켜 multiRunner의 재시도 래퍼를 거치게 하고,
+메서드별 호출 수, 추가된 행, J열 로그, G열 텍스트 색상과 A~I열 배경색을 확인합니다.
+"""
+from datetime import datetime, timedelta
+import io
+
+import pytest
+
+pytest.importorskip('bs4')
+
+import toptenKeyword
+from fakeSheets import FakeHttpError, FakeSpreadsheets, make_keyword_html
+from keywordCore import BACKGROUND_FORMATS, TEXT_COLOR_FORMATS
+from keywordIndex import KeywordIndex
+from multiRunner import RateLimitedSheet, RateLimiter
+from rankHistory import RankHistoryIndex, default_snapshot_path
+from runJournal import RunJournal
+
+SPREADSHEET_ID = 'fake-spreadsheet'
+SOURCE = toptenKeyword.SOURCE_SHEET_NAME
+HISTORY = toptenKeyword.SHEET_NAME
+TODAY = datetime.now().strftime('%Y-%m-%d')
+YESTERDAY = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+class FlakyBackend(FakeSpreadsheets):
+    """메서드마다 첫 요청을 429로 실패시키는 백엔드"""
+    def _execute(self, method, func):
+        if method not in self.errors:
+            self.calls[method] += 1
+            self.errors[method] += 1
+            raise FakeHttpError(429, 'Quota exceeded')
+        return super()._execute(method, func)
+
+def text_color(backend, row):
+    return backend.get_format(SPREADSHEET_ID, HISTORY, row - 1, 6).get('textFormat')
+
+def background(backend, row, col):
+    return backend.get_format(SPREADSHEET_ID, HISTORY, row - 1, col).get('backgroundColor')
+
+@pytest.fixture
+def backend():
+    backend = FlakyBackend()
+    backend.add_sheet(SPREADSHEET_ID, SOURCE, [
+        ['카테고리ID', 'B', 'C', '카테고리명', 'E', 'F', 'G', 'H', 'HTML', '로그'],
+        ['1001', '', '', '여성패션', '', '', '', '', make_keyword_html('여성패션', ['원피스', '니트', '셔츠', '청바지']), ''],
+        ['1002', '', '', '남성패션', '', '', '', '', make_keyword_html('남성패션', ['정장']), '처리 완료: 이전 실행'],
+        ['1003', '', '', '가전', '', '', '', '', '', ''],
+        ['1004', '', '', '식품', '', '', '', '', make_keyword_html('식품', ['생수', '라면']), ''],
+    ])
+    history = backend.add_sheet(SPREADSHEET_ID, HISTORY, [
+        ['날짜', '유형', '카테고리ID', '카테고리', '순위', '키워드', '순위상승', '체크'],
+        [YESTERDAY, '', '1001', '여성패션', '3', '원피스', 'new', 'TRUE'],
+        [YESTERDAY, '', '1001', '여성패션', '1', '니트', 'new', 'TRUE'],
+        [YESTERDAY, '', '1001', '여성패션', '4', '청바지', 'new', 'TRUE'],
+    ])
+    # 마지막 이력 행은 연한 회색2 → 다음 카테고리는 흰색, 그다음은 회색으로 번갈아 칠해짐
+    gray = BACKGROUND_FORMATS['gray']['userEnteredFormat']
+    for col in range(9):
+        history.formats[(3, col)] = dict(gray)
+    return backend
+
+def test_main_against_fake_backend(backend, tmp_path):
+    sheet = RateLimitedSheet(backend, RateLimiter(0), retry_base_delay=0)
+    report = toptenKeyword.main(
+        SPREADSHEET_ID, sheet=sheet, confirm=False,
+        journal=RunJournal(str(tmp_path / 'journal.jsonl')),
+        history=RankHistoryIndex(str(tmp_path / 'rank_history.bin')),
+        keyword_index=KeywordIndex(str(tmp_path / 'keyword_index.jsonl')),
+        summary=False
+    )
+
+    assert (report['categories'], report['written'], report['failed'], report['rows']) == (2, 2, 0, 6)
+    assert (report['new'], report['up'], report['down']) == (3, 1, 1)
+
+    # 첫 요청 1회 실패 + 성공한 요청 수
+    assert dict(backend.errors) == {method: 1 for method in backend.calls}
+    assert dict(backend.calls) == {
+        'values.batchGet': 1 + 2,      # A/D/J열 1회 + I열 1묶음
+        'values.get': 1 + 3,           # 이력 시트 새 행 읽기 (카테고리마다) + 빈 키워드 색인의 첫 동기화
+        'spreadsheets.get': 1 + 4,     # 카테고리마다 시트 ID + 마지막 행 배경색
+        'values.append': 1 + 2,
+        'spreadsheets.batchUpdate': 1 + 2,
+        'values.update': 1 + 2,        # J열 로그
+    }
+
+    rows = backend.get_rows(SPREADSHEET_ID, HISTORY)
+    assert [row[:8] for row in rows[4:]] == [
+        [TODAY, 'cp_keyword', '1001', '여성패션', '1', '원피스', '▲2', 'TRUE'],
+        [TODAY, 'cp_keyword', '1001', '여성패션', '2', '니트', '▼1', 'TRUE'],
+        [TODAY, 'cp_keyword', '1001', '여성패션', '3', '셔츠', 'new', 'TRUE'],
+        [TODAY, 'cp_keyword', '1001', '여성패션', '4', '청바지', '(-)', 'TRUE'],
+        [TODAY, 'cp_keyword', '1004', '식품', '1', '생수', 'new', 'TRUE'],
+        [TODAY, 'cp_keyword', '1004', '식품', '2', '라면', 'new', 'TRUE'],
+    ]
+
+    # J열 로그: 처리한 행만 기록, 이미 처리된 행과 I열이 빈 행은 그대로
+    logs = [row[9] if len(row) > 9 else '' for row in backend.get_rows(SPREADSHEET_ID, SOURCE)]
+    assert logs[1].startswith('처리 완료: ') and logs[4].startswith('처리 완료: ')
+    assert logs[2:4] == ['처리 완료: 이전 실행', '']
+
+    # G열 텍스트 색상: ▲/new 빨간색, ▼ 파란색, (-) 검정색
+    expected_colors = ['red', 'blue', 'red', 'black', 'red', 'red']
+    assert [text_color(backend, row) for row in range(5, 11)] == [
+        TEXT_COLOR_FORMATS[color]['userEnteredFormat']['textFormat'] for color in expected_colors
+    ]
+
+    # A~I열 배경색: 회색 다음 카테고리는 흰색, 그다음 카테고리는 회색
+    white = BACKGROUND_FORMATS['white']['userEnteredFormat']['backgroundColor']
+    gray = BACKGROUND_FORMATS['gray']['userEnteredFormat']['backgroundColor']
+    for row, expected in [(5, white), (8, white), (9, gray), (10, gray)]:
+        assert [background(backend, row, col) for col in range(9)] == [expected] * 9
+    assert background(backend, 5, 9) is None
+
+@pytest.mark.parametrize('verbosity, detailed', [('quiet', False), ('verbose', True)])
+def test_confirm_shows_one_line_per_keyword(backend, tmp_path, monkeypatch, capsys, verbosity, detailed):
+    monkeypatch.setattr(toptenKeyword, 'input_with_timeout', lambda *args, **kwargs: 'n')
+    toptenKeyword.configure_logging(verbosity, stream=io.StringIO())
+    try:
+        report = toptenKeyword.main(
+            SPREADSHEET_ID, sheet=RateLimitedSheet(backend, RateLimiter(0), retry_base_delay=0), confirm=True,
+            journal=RunJournal(str(tmp_path / 'journal.jsonl')),
+            history=RankHistoryIndex(str(tmp_path / 'rank_history.bin')),
+            keyword_index=KeywordIndex(str(tmp_path / 'keyword_index.jsonl')),
+            summary=False
+        )
+    finally:
+        toptenKeyword.configure_logging()
+
+    assert report['written'] == 0
+    out = capsys.readouterr().out
+    # 키워드마다 한 줄, verbose 수준에서는 그 대신 항목별 상세 출력(키워드마다 8줄)
+    assert ('  1. 원피스 (여성패션)\n  2. 니트 (여성패션)\n' in out) != detailed
+    assert ('  2. 라면 (식품)\n' in out) != detailed
+    assert ('7. 키워드 : 원피스' in out) == detailed
+
+@pytest.mark.parametrize('counts, status', [
+    ({}, '처리 완료'),
+    ({'failed': 1}, '일부 처리 실패'),
+    ({'unread': 1}, '일부 처리 실패'),
+    ({'targets': (1, 2)}, '일부 처리 실패'),
+])
+def test_report_status(counts, status):
+    stream = io.StringIO()
+    toptenKeyword.configure_logging('quiet', stream=stream)
+    try:
+        report = toptenKeyword.merge_reports([])
+        report.update(counts)
+        toptenKeyword.log_report(report)
+    finally:
+        toptenKeyword.configure_logging()
+    assert f"\n{status}: 카테고리" in stream.getvalue()
+
+def test_default_snapshot_path_is_per_sheet():
+    # 같은 워크북의 이력 시트마다 스냅샷을 따로 저장해야 watermark가 섞이지 않음
+    assert default_snapshot_path(SPREADSHEET_ID, HISTORY) != default_snapshot_path(SPREADSHEET_ID, '다른 이력')
+    assert default_snapshot_path(SPREADSHEET_ID, HISTORY).endswith(f'rank_history_{SPREADSHEET_ID}_{HISTORY}.bin')
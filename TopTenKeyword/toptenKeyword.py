@@ -1,278 +1,320 @@
-from bs4 import BeautifulSoup
+"""
+쿠팡 탑텐 키워드를 시트에 등록시키는 스크립트
+
+파싱/순위 계산 로직은 keywordCore에 있고, 이 모듈은 Google Sheets 입출력과 실행 흐름을 담당합니다.
+googleapiclient와 auth 모듈은 시트에 처음 접근할 때 불러오므로, import만 할 때는 인증 파일이 필요 없습니다.
+"""
 from datetime import datetime
+import heapq
+import logging
+import logging.handlers
 import re
 import sys
 import threading
 import time
-import msvcrt
 import os
 
-# auth.py 파일 경로 추가
-# API_KEY_DIR.txt에서 경로 읽기
+from keywordCore import (
+    BACKGROUND_FIELDS,
+    BACKGROUND_FORMATS,
+    TEXT_COLOR_FIELDS,
+    TEXT_COLOR_FORMATS,
+    build_format_requests,
+    calculate_rank_change,
+    calculate_rank_changes,
+    get_rank_change_color,
+    is_light_gray1,
+    is_light_gray2,
+    is_white_or_no_color,
+    normalize_keyword,
+    parse_keywords,
+)
+from keywordIndex import KeywordIndex, default_index_path
+from rankHistory import RankHistoryIndex, default_snapshot_path
+from runJournal import RunJournal, html_digest, make_row_key
+
+# auth.py 파일 경로 (API_KEY_DIR.txt에서 읽음)
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
 api_key_dir_path = os.path.join(project_root, 'API_KEY_DIR.txt')
 
-try:
-    with open(api_key_dir_path, 'r', encoding='utf-8') as f:
-        api_key_dir = f.read().strip()
-    if api_key_dir:
-        sys.path.append(api_key_dir)
-    else:
-        raise ValueError("API_KEY_DIR.txt 파일이 비어있습니다.")
-except FileNotFoundError:
-    print(f"오류: API_KEY_DIR.txt 파일을 찾을 수 없습니다. ({api_key_dir_path})")
-    sys.exit(1)
-except Exception as e:
-    print(f"오류: API_KEY_DIR.txt 파일을 읽는 중 문제가 발생했습니다: {e}")
-    sys.exit(1)
+# 기본 스프레드시트 ID와 시트 이름
+SPREADSHEET_ID = "1YWiFGyJjNDbOC8eFTbS1HEhmxfZAC-hLvI8KdA1Gku8"
+SOURCE_SHEET_NAME = "0.(DB)쿠팡카테고리"
+SHEET_NAME = "0.(DB)쿠팡_탑텐키워드"
+HTML_CHUNK_SIZE = 20  # I열 HTML을 한 번에 읽을 행 수 (행당 수백 KB)
 
-from auth import get_credentials
+# 출력 수준: quiet(경고/오류와 최종 보고만), normal(카테고리당 한 줄 + 최종 보고), verbose(키워드별 상세)
+LOG_LEVELS = {'quiet': logging.WARNING, 'normal': logging.INFO, 'verbose': logging.DEBUG}
+LOG_BUFFER_CAPACITY = 200  # 콘솔에 한 번에 내보낼 로그 줄 수 (경고 이상은 바로 출력)
+TOP_MOVERS = 5             # 최종 보고에 보여줄 순위 변동 상위 키워드 수
 
-from googleapiclient.discovery import build
+logger = logging.getLogger('toptenKeyword')
+# 최종 보고는 quiet에서도 출력
+report_logger = logging.getLogger('toptenKeyword.report')
 
-def parse_keywords(html_content, category_id=''):
+def configure_logging(verbosity='normal', stream=None):
     """
-    HTML 콘텐츠를 파싱하여 키워드 정보를 추출합니다.
+    콘솔 출력 수준을 설정합니다. 로그는 메모리에 모아 두었다가 LOG_BUFFER_CAPACITY 줄마다,
+    또는 경고 이상이 기록될 때 한 번에 내보내므로 콘솔 쓰기 횟수가 줄어듭니다.
     
     Args:
-        html_content: HTML 문자열
-        category_id: 카테고리ID (기본값: 빈 문자열)
-    
-    Returns:
-        추출된 키워드 정보 리스트
+        verbosity: 'quiet', 'normal', 'verbose' 중 하나
+        stream: 출력 스트림 (기본값: sys.stdout)
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    global _log_handler
+    root = logging.getLogger()
+    if _log_handler is not None:
+        root.removeHandler(_log_handler)
+        _log_handler.close()
     
-    # 오늘 날짜
-    today = datetime.now().strftime('%Y-%m-%d')
+    console = logging.StreamHandler(stream or sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    _log_handler = logging.handlers.MemoryHandler(
+        LOG_BUFFER_CAPACITY, flushLevel=logging.WARNING, target=console
+    )
+    root.addHandler(_log_handler)
     
-    # 카테고리 추출 (strong 태그에서 "여성패션" 같은 텍스트 추출)
-    category_tag = soup.find('strong', {'data-v-53787c54': ''})
-    category = ''
-    if category_tag:
-        category_text = category_tag.get_text(strip=True)
-        # 따옴표 제거
-        category = category_text.strip('"')
+    level = LOG_LEVELS[verbosity]
+    for name in ('toptenKeyword', 'rankHistory', 'keywordIndex', 'multiRunner'):
+        logging.getLogger(name).setLevel(level)
+    report_logger.setLevel(logging.INFO)
+
+_log_handler = None
+
+def flush_logs():
+    """모아 둔 로그를 바로 내보냅니다. (입력을 기다리거나 한동안 대기하기 전에 호출)"""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+class ApiKeyDirError(RuntimeError):
+    """API_KEY_DIR.txt에서 auth.py 경로를 읽을 수 없을 때 발생하는 예외"""
+
+def load_api_key_dir():
+    """
+    API_KEY_DIR.txt에서 auth.py가 있는 경로를 읽어 sys.path에 추가합니다.
+    시트에 처음 접근할 때 한 번만 호출됩니다.
     
-    # 키워드 항목들 추출
-    keyword_items = soup.find_all('div', class_='_keyword-item-container_1vje2_11')
+    Raises:
+        ApiKeyDirError: 파일이 없거나 비어있거나 읽을 수 없는 경우
+    """
+    try:
+        with open(api_key_dir_path, 'r', encoding='utf-8') as f:
+            api_key_dir = f.read().strip()
+    except FileNotFoundError as e:
+        raise ApiKeyDirError(f"API_KEY_DIR.txt 파일을 찾을 수 없습니다. ({api_key_dir_path})") from e
+    except (OSError, UnicodeDecodeError) as e:
+        raise ApiKeyDirError(f"API_KEY_DIR.txt 파일을 읽는 중 문제가 발생했습니다: {e}") from e
+    if not api_key_dir:
+        raise ApiKeyDirError(f"API_KEY_DIR.txt 파일이 비어있습니다. ({api_key_dir_path})")
+    if api_key_dir not in sys.path:
+        sys.path.append(api_key_dir)
+
+def get_sheet_service():
+    """
+    인증 정보를 가져와 Sheets API 서비스 객체를 만듭니다.
+    auth 모듈과 googleapiclient는 이 함수가 처음 호출될 때 불러옵니다.
     
-    results = []
+    Returns:
+        spreadsheets() 리소스 객체
+    """
+    load_api_key_dir()
+    from auth import get_credentials
+    from googleapiclient.discovery import build
     
-    for item in keyword_items:
-        # 순위 추출
-        rank_tag = item.find('div', class_='_keyword-item-number_1vje2_22')
-        rank = ''
-        if rank_tag:
-            rank = rank_tag.get_text(strip=True)
-        
-        # 키워드 추출
-        keyword_tag = item.find('div', class_='_keyword-item-content_1vje2_46')
-        keyword = ''
-        if keyword_tag:
-            keyword = keyword_tag.get_text(strip=True)
-        
-        # 순위와 키워드가 모두 있을 때만 결과에 추가
-        if rank and keyword:
-            result = {
-                '오늘날짜': today,
-                '유형': 'cp_keyword',
-                '카테고리ID': category_id,
-                '카테고리': category,
-                '순위': rank,
-                '순위상승': '',
-                '키워드': keyword
-            }
-            results.append(result)
-    
-    return results
-
-def print_results(results):
+    creds = get_credentials()
+    service = build('sheets', 'v4', credentials=creds)
+    return service.spreadsheets()
+
+def print_results(results, stream=None):
     """
     결과를 요청된 형식으로 출력합니다.
+    
+    Args:
+        results: 추출된 키워드 정보 리스트
+        stream: 출력 수준과 관계없이 바로 쓸 스트림 (없으면 verbose 수준에서만 로그로 출력)
     """
+    if stream is None and not logger.isEnabledFor(logging.DEBUG):
+        return
+    lines = []
     for result in results:
-        print(f"1. 오늘날짜 : {result['오늘날짜']}")
-        print(f"2. 유형 : {result['유형']}")
-        print(f"3. 카테고리ID : {result['카테고리ID']}")
-        print(f"4. 카테고리 : {result['카테고리']}")
-        print(f"5. 순위 : {result['순위']}")
-        print(f"6. 순위상승 : {result['순위상승']}")
-        print(f"7. 키워드 : {result['키워드']}")
-        print("-" * 50)
+        lines.append(f"1. 오늘날짜 : {result['오늘날짜']}")
+        lines.append(f"2. 유형 : {result['유형']}")
+        lines.append(f"3. 카테고리ID : {result['카테고리ID']}")
+        lines.append(f"4. 카테고리 : {result['카테고리']}")
+        lines.append(f"5. 순위 : {result['순위']}")
+        lines.append(f"6. 순위상승 : {result['순위상승']}")
+        lines.append(f"7. 키워드 : {result['키워드']}")
+        lines.append("-" * 50)
+    text = "\n".join(lines)
+    if stream is None:
+        logger.debug(text)
+    else:
+        stream.write(text + "\n")
+        stream.flush()
 
-def is_light_gray1(rgb_color):
+def print_result_lines(results, stream):
     """
-    RGB 색상이 연한 회색1인지 확인합니다.
+    결과를 키워드마다 한 줄(순위, 키워드, 카테고리)로 출력합니다. (확인 모드의 입력 여부 확인용)
     
     Args:
-        rgb_color: RGB 색상 딕셔너리 또는 None
-    
-    Returns:
-        연한 회색1이면 True, 아니면 False
+        results: 추출된 키워드 정보 리스트
+        stream: 출력할 스트림
     """
-    if rgb_color is None:
-        return False
-    
-    # RGB 값 추출 (0.0 ~ 1.0 범위)
-    red = rgb_color.get('red', 0.0)
-    green = rgb_color.get('green', 0.0)
-    blue = rgb_color.get('blue', 0.0)
-    
-    # 연한 회색1: RGB(217, 217, 217) = (0.851, 0.851, 0.851)
-    # 약간의 오차 허용 (0.84 ~ 0.86)
-    if (0.84 <= red <= 0.86 and 
-        0.84 <= green <= 0.86 and 
-        0.84 <= blue <= 0.86):
-        return True
-    
-    return False
+    lines = [f"{result['순위']:>3}. {result['키워드']} ({result['카테고리']})" for result in results]
+    stream.write("\n".join(lines) + "\n")
+    stream.flush()
 
-def is_light_gray2(rgb_color):
+def get_pending_rows(spreadsheet_id=SPREADSHEET_ID, source_sheet_name=SOURCE_SHEET_NAME, sheet=None):
     """
-    RGB 색상이 연한 회색2인지 확인합니다.
+    '0.(DB)쿠팡카테고리' 시트에서 J열이 빈칸인 행의 행 번호, A열 카테고리ID, D열 카테고리명을 가져옵니다.
+    용량이 큰 I열(HTML)은 읽지 않습니다.
     
     Args:
-        rgb_color: RGB 색상 딕셔너리 또는 None
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
     
     Returns:
-        연한 회색2이면 True, 아니면 False
+        (행 번호, 카테고리ID, 카테고리명) 튜플 리스트
     """
-    if rgb_color is None:
-        return False
-    
-    # RGB 값 추출 (0.0 ~ 1.0 범위)
-    red = rgb_color.get('red', 0.0)
-    green = rgb_color.get('green', 0.0)
-    blue = rgb_color.get('blue', 0.0)
-    
-    # 연한 회색2: RGB(191, 191, 191) = (0.749, 0.749, 0.749)
-    # 약간의 오차 허용 (0.73 ~ 0.77)
-    if (0.73 <= red <= 0.77 and 
-        0.73 <= green <= 0.77 and 
-        0.73 <= blue <= 0.77):
-        return True
-    
-    return False
+    try:
+        if sheet is None:
+            sheet = get_sheet_service()
+        
+        # A열, D열, J열 데이터를 한 번에 가져오기
+        data = sheet.values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=[
+                f"'{source_sheet_name}'!A:A",
+                f"'{source_sheet_name}'!D:D",
+                f"'{source_sheet_name}'!J:J",
+            ]
+        ).execute()
+        
+        value_ranges = data.get('valueRanges', [])
+        a_values, d_values, j_values = [
+            value_ranges[i].get('values', []) if len(value_ranges) > i else []
+            for i in range(3)
+        ]
+        
+        def cell(values, idx):
+            if idx <= len(values) and len(values[idx - 1]) > 0:
+                return values[idx - 1][0] or ''
+            return ''
+        
+        # A열이나 D열이 채워진 마지막 행까지 J열이 빈칸인 행을 선택 (행 번호는 1-based)
+        last_row = max(len(a_values), len(d_values), len(j_values))
+        return [
+            (idx, cell(a_values, idx), cell(d_values, idx))
+            for idx in range(1, last_row + 1)
+            if not cell(j_values, idx).strip()
+        ]
+        
+    except Exception as e:
+        logger.exception(f"시트에서 처리할 행을 가져오는 중 오류 발생: {e}")
+        return []
 
-def is_white_or_no_color(rgb_color):
+def _row_ranges(row_numbers):
+    """정렬된 행 번호 리스트를 연속 구간 (시작 행, 끝 행) 리스트로 묶습니다."""
+    ranges = []
+    for row_number in row_numbers:
+        if ranges and ranges[-1][1] == row_number - 1:
+            ranges[-1][1] = row_number
+        else:
+            ranges.append([row_number, row_number])
+    return ranges
+
+def iter_html_rows(spreadsheet_id=SPREADSHEET_ID, source_sheet_name=SOURCE_SHEET_NAME, sheet=None,
+                   chunk_size=HTML_CHUNK_SIZE, pending_rows=None, on_error=None):
     """
-    RGB 색상이 흰색이거나 없는지 확인합니다.
+    J열이 빈칸인 행의 I열 HTML을 chunk_size 행씩 나눠 읽어 하나씩 돌려주는 제너레이터
+    
+    한 번에 chunk_size 행의 HTML만 메모리에 올리고, 다음 묶음을 읽기 전에 이전 묶음을 버리므로
+    처리할 행이 많아도 사용하는 메모리는 묶음 크기만큼으로 제한됩니다.
     
     Args:
-        rgb_color: RGB 색상 딕셔너리 또는 None
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
+        chunk_size: 한 번에 읽을 행 수
+        pending_rows: get_pending_rows의 결과 (없으면 새로 가져옴)
+        on_error: 묶음을 읽지 못했을 때 그 묶음의 pending_rows 항목 리스트를 받아 호출할 함수
+                  (읽지 못한 묶음은 건너뛰고 다음 묶음을 계속 읽음)
     
-    Returns:
-        흰색이거나 없으면 True, 아니면 False
+    Yields:
+        (행 번호, HTML 내용, 카테고리ID, 카테고리명) 튜플 (I열이 비어있는 행은 건너뜀)
     """
-    if rgb_color is None:
-        return True
-    
-    # RGB 값 추출 (0.0 ~ 1.0 범위)
-    red = rgb_color.get('red', 1.0)
-    green = rgb_color.get('green', 1.0)
-    blue = rgb_color.get('blue', 1.0)
-    
-    # 흰색인지 확인 (모든 값이 1.0에 가까우면 흰색)
-    # 또는 alpha가 0이면 투명(색상 없음)
-    alpha = rgb_color.get('alpha', 1.0)
-    
-    if alpha == 0.0:
-        return True
+    if sheet is None:
+        sheet = get_sheet_service()
     
-    # 흰색 체크 (1.0 또는 0.99 이상)
-    if red >= 0.99 and green >= 0.99 and blue >= 0.99:
-        return True
+    if pending_rows is None:
+        pending_rows = get_pending_rows(spreadsheet_id, source_sheet_name, sheet)
     
-    return False
+    for chunk_start in range(0, len(pending_rows), chunk_size):
+        chunk = pending_rows[chunk_start:chunk_start + chunk_size]
+        row_ranges = _row_ranges([row_number for row_number, _, _ in chunk])
+        
+        try:
+            data = sheet.values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=[f"'{source_sheet_name}'!I{first}:I{last}" for first, last in row_ranges]
+            ).execute()
+        except Exception as e:
+            logger.exception(f"시트에서 HTML을 가져오는 중 오류 발생 (행 {chunk[0][0]}~{chunk[-1][0]}): {e}")
+            if on_error is not None:
+                on_error(chunk)
+            continue
+        
+        html_by_row = {}
+        for (first, _), value_range in zip(row_ranges, data.get('valueRanges', [])):
+            for offset, row in enumerate(value_range.get('values', [])):
+                if row and row[0]:
+                    html_by_row[first + offset] = row[0]
+        del data
+        
+        for row_number, category_id, category_name in chunk:
+            # 넘겨준 HTML은 딕셔너리에서 빼서, 처리가 끝나면 바로 해제되게 함
+            html_content = html_by_row.pop(row_number, None)
+            if html_content:
+                yield row_number, html_content, category_id, category_name
+        del html_by_row
 
-def get_html_from_sheet():
+def get_html_from_sheet(spreadsheet_id=SPREADSHEET_ID, source_sheet_name=SOURCE_SHEET_NAME, sheet=None):
     """
     '0.(DB)쿠팡카테고리' 시트에서 J열이 빈칸인 행의 I열 HTML, A열 카테고리ID, D열 카테고리명을 가져옵니다.
     
+    모든 HTML을 한 번에 리스트로 만들기 때문에 행이 많으면 메모리를 많이 사용합니다.
+    main()처럼 순서대로 처리하는 경우에는 iter_html_rows를 사용하세요.
+    
+    Args:
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
+    
     Returns:
         (행 번호, HTML 내용, 카테고리ID, 카테고리명) 튜플 리스트
     """
-    SPREADSHEET_ID = "1YWiFGyJjNDbOC8eFTbS1HEhmxfZAC-hLvI8KdA1Gku8"
-    SOURCE_SHEET_NAME = "0.(DB)쿠팡카테고리"
-    
-    try:
-        # 인증 정보 가져오기
-        creds = get_credentials()
-        
-        # Sheets API 서비스 빌드
-        service = build('sheets', 'v4', credentials=creds)
-        sheet = service.spreadsheets()
-        
-        # A열 데이터 가져오기
-        a_col_data = sheet.values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{SOURCE_SHEET_NAME}'!A:A"
-        ).execute()
-        
-        # D열 데이터 가져오기
-        d_col_data = sheet.values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{SOURCE_SHEET_NAME}'!D:D"
-        ).execute()
-        
-        # I열, J열 데이터 가져오기
-        ij_col_data = sheet.values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{SOURCE_SHEET_NAME}'!I:J"
-        ).execute()
-        
-        a_values = a_col_data.get('values', [])
-        d_values = d_col_data.get('values', [])
-        ij_values = ij_col_data.get('values', [])
-        
-        # J열이 빈칸인 행의 I열 HTML, A열 카테고리ID, D열 카테고리명 추출 (행 번호는 1-based)
-        html_rows = []
-        for idx, row in enumerate(ij_values, start=1):
-            i_col = row[0] if len(row) > 0 and row[0] else ''  # I열
-            j_col = row[1] if len(row) > 1 and row[1] else ''  # J열
-            
-            # I열에 HTML이 있고, J열이 빈칸인 경우만 선택
-            if i_col and not j_col.strip():
-                # 같은 행의 A열 카테고리ID 가져오기
-                category_id = ''
-                if idx <= len(a_values) and len(a_values[idx - 1]) > 0:
-                    category_id = a_values[idx - 1][0] if a_values[idx - 1][0] else ''
-                
-                # 같은 행의 D열 카테고리명 가져오기
-                category_name = ''
-                if idx <= len(d_values) and len(d_values[idx - 1]) > 0:
-                    category_name = d_values[idx - 1][0] if d_values[idx - 1][0] else ''
-                
-                html_rows.append((idx, i_col, category_id, category_name))
-        
-        return html_rows
-        
-    except Exception as e:
-        print(f"시트에서 HTML을 가져오는 중 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+    return list(iter_html_rows(spreadsheet_id, source_sheet_name, sheet))
 
-def update_processing_log(row_number, log_message):
+def update_processing_log(row_number, log_message, spreadsheet_id=SPREADSHEET_ID,
+                          source_sheet_name=SOURCE_SHEET_NAME, sheet=None):
     """
     '0.(DB)쿠팡카테고리' 시트의 특정 행의 J열에 처리 로그를 남깁니다.
     
     Args:
         row_number: 행 번호 (1-based)
         log_message: 로그 메시지
-    """
-    SPREADSHEET_ID = "1YWiFGyJjNDbOC8eFTbS1HEhmxfZAC-hLvI8KdA1Gku8"
-    SOURCE_SHEET_NAME = "0.(DB)쿠팡카테고리"
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
     
+    Returns:
+        로그 작성에 성공하면 True, 실패하면 False
+    """
     try:
-        # 인증 정보 가져오기
-        creds = get_credentials()
-        
-        # Sheets API 서비스 빌드
-        service = build('sheets', 'v4', credentials=creds)
-        sheet = service.spreadsheets()
+        if sheet is None:
+            sheet = get_sheet_service()
         
         # J열에 로그 작성
         body = {
@@ -280,16 +322,16 @@ def update_processing_log(row_number, log_message):
         }
         
         sheet.values().update(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{SOURCE_SHEET_NAME}'!J{row_number}",
+            spreadsheetId=spreadsheet_id,
+            range=f"'{source_sheet_name}'!J{row_number}",
             valueInputOption='USER_ENTERED',
             body=body
         ).execute()
+        return True
         
     except Exception as e:
-        print(f"로그 작성 중 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"로그 작성 중 오류 발생: {e}")
+        return False
 
 def get_previous_rank(sheet, spreadsheet_id, sheet_name, category_id, keyword, current_date):
     """
@@ -307,87 +349,40 @@ def get_previous_rank(sheet, spreadsheet_id, sheet_name, category_id, keyword, c
         이전 순위 (int) 또는 None (이전 데이터가 없는 경우)
     """
     try:
-        # 전체 데이터 가져오기
-        all_data = sheet.values().get(
-            spreadsheetId=spreadsheet_id,
-            range=f"'{sheet_name}'!A:H"
-        ).execute()
-        
-        values = all_data.get('values', [])
-        
-        # 헤더 행이 있으면 제외
-        if not values or len(values) == 0:
-            return None
-        
-        # 같은 카테고리ID의 데이터 중에서
-        # 현재 날짜보다 이전 날짜의 데이터를 찾기
-        previous_ranks = []
-        
-        for row in values:
-            if len(row) < 7:  # 최소 A~G열 필요
-                continue
-            
-            row_date = row[0] if len(row) > 0 else ''  # A열: 날짜
-            row_category_id = row[2] if len(row) > 2 else ''  # C열: 카테고리ID
-            row_keyword = row[5] if len(row) > 5 else ''  # F열: 키워드
-            row_rank = row[4] if len(row) > 4 else ''  # E열: 순위
-            
-            # 같은 카테고리ID와 키워드인지 확인
-            if row_category_id == category_id and row_keyword == keyword:
-                # 날짜 비교 (현재 날짜보다 이전인지)
-                try:
-                    row_date_obj = datetime.strptime(row_date, '%Y-%m-%d')
-                    current_date_obj = datetime.strptime(current_date, '%Y-%m-%d')
-                    
-                    if row_date_obj < current_date_obj:
-                        # 순위가 숫자인지 확인
-                        try:
-                            rank = int(row_rank)
-                            previous_ranks.append((row_date_obj, rank))
-                        except (ValueError, TypeError):
-                            continue
-                except (ValueError, TypeError):
-                    continue
-        
-        # 가장 최근 날짜의 순위 반환
-        if previous_ranks:
-            previous_ranks.sort(key=lambda x: x[0], reverse=True)  # 날짜 내림차순 정렬
-            return previous_ranks[0][1]  # 가장 최근 순위 반환
-        
-        return None
+        # 이력 스냅샷을 불러오고 그 이후에 추가된 행만 읽어 인덱스로 조회
+        # (여러 키워드를 조회할 때는 RankHistoryIndex를 직접 재사용하는 것이 훨씬 빠름)
+        history = RankHistoryIndex(default_snapshot_path(spreadsheet_id, sheet_name))
+        history.refresh(sheet, spreadsheet_id, sheet_name)
+        return history.get_previous_rank(category_id, keyword, current_date)
         
     except Exception as e:
-        print(f"  이전 순위 조회 중 오류 발생: {e}")
+        logger.error(f"  이전 순위 조회 중 오류 발생: {e}")
         return None
 
-def calculate_rank_change(current_rank, previous_rank):
+def _input_with_timeout_posix(prompt, timeout=15, default='y'):
     """
-    순위 변화를 계산합니다.
-    
-    Args:
-        current_rank: 현재 순위 (int)
-        previous_rank: 이전 순위 (int 또는 None)
-    
-    Returns:
-        순위 변화 문자열: "▲3", "▼2", "(-)", "new"
+    input_with_timeout의 Windows 외 환경용 구현 (한 줄 입력, 카운트다운 표시 없음)
     """
-    if previous_rank is None:
-        return "new"
+    import select
     
+    sys.stdout.write(f"{prompt} ({timeout}초 후 자동 진행) ")
+    sys.stdout.flush()
     try:
-        current = int(current_rank)
-        previous = int(previous_rank)
-        
-        change = previous - current  # 이전 순위 - 현재 순위 (상승하면 양수)
-        
-        if change > 0:
-            return f"▲{change}"
-        elif change < 0:
-            return f"▼{abs(change)}"  # 절댓값 사용
-        else:
-            return "(-)"
-    except (ValueError, TypeError):
-        return "(-)"
+        ready, _, _ = select.select([sys.stdin], [], [], timeout)
+        if not ready:
+            sys.stdout.write(f"\n{prompt} 자동으로 '{default}' 처리합니다.\n")
+            sys.stdout.flush()
+            return default
+        user_input = sys.stdin.readline()
+        return user_input.strip().lower() if user_input.strip() else default
+    except KeyboardInterrupt:
+        sys.stdout.write("\n입력이 중단되었습니다.\n")
+        sys.stdout.flush()
+        return 'n'
+    except Exception as e:
+        sys.stdout.write(f"\n입력 중 오류 발생: {e}\n")
+        sys.stdout.flush()
+        return default
 
 def input_with_timeout(prompt, timeout=15, default='y'):
     """
@@ -401,8 +396,11 @@ def input_with_timeout(prompt, timeout=15, default='y'):
     Returns:
         사용자 입력 또는 기본값
     """
-    import sys
-    import os
+    try:
+        import msvcrt
+    except ImportError:
+        # Windows가 아니면 콘솔 키 입력(msvcrt)을 쓸 수 없으므로 select 기반 입력 사용
+        return _input_with_timeout_posix(prompt, timeout, default)
     
     # Windows에서 ANSI escape codes 활성화
     if sys.platform == 'win32':
@@ -509,402 +507,501 @@ def input_with_timeout(prompt, timeout=15, default='y'):
         sys.stdout.flush()
         return default
 
-def write_to_sheet(results):
+def _find_sheet_id(sheet, spreadsheet_id, sheet_name):
     """
-    추출된 키워드 정보를 Google Sheets에 입력합니다.
+    시트 이름으로 시트 ID를 찾습니다. 없으면 오류를 출력하고 None을 돌려줍니다.
+    """
+    spreadsheet = sheet.get(spreadsheetId=spreadsheet_id).execute()
+    for sheet_info in spreadsheet.get('sheets', []):
+        if sheet_info['properties']['title'] == sheet_name:
+            return sheet_info['properties']['sheetId']
+    logger.error(f"시트 '{sheet_name}'를 찾을 수 없습니다.")
+    return None
+
+def append_results(results, spreadsheet_id, sheet_name, sheet, history=None, keyword_index=None):
+    """
+    순위상승을 계산해 결과를 시트 끝에 추가(append)합니다. 서식은 적용하지 않습니다.
     
     Args:
-        results: 추출된 키워드 정보 리스트
+        results: 추출된 키워드 정보 리스트 (순위상승이 채워짐)
+        spreadsheet_id: 스프레드시트 ID
+        sheet_name: 탑텐키워드 시트 이름
+        sheet: Sheets API 서비스 객체
+        history: 이력 순위 인덱스 (RankHistoryIndex, 없으면 전체 이력을 새로 읽음)
+        keyword_index: 키워드 → 카테고리 역색인 (KeywordIndex, 선택)
+    
+    Returns:
+        추가 결과 딕셔너리 (sheet_id, updated_range, updated_cells, background, colors) 또는 None (시트가 없는 경우)
+        colors는 results 순서대로의 G열 색상 리스트입니다.
     """
-    # 스프레드시트 ID와 시트 이름
-    SPREADSHEET_ID = "1YWiFGyJjNDbOC8eFTbS1HEhmxfZAC-hLvI8KdA1Gku8"
-    SHEET_NAME = "0.(DB)쿠팡_탑텐키워드"
+    sheet_id = _find_sheet_id(sheet, spreadsheet_id, sheet_name)
+    if sheet_id is None:
+        return None
     
-    if not results:
-        print("스프레드시트에 입력할 데이터가 없습니다.")
-        return
+    # 이력 인덱스 갱신 (이전에 읽은 행 이후에 추가된 행만 가져옴)
+    if history is None:
+        history = RankHistoryIndex(default_snapshot_path(spreadsheet_id, sheet_name))
+    history.refresh(sheet, spreadsheet_id, sheet_name)
     
-    try:
-        # 인증 정보 가져오기
-        creds = get_credentials()
-        
-        # Sheets API 서비스 빌드
-        service = build('sheets', 'v4', credentials=creds)
-        sheet = service.spreadsheets()
-        
-        # 시트 정보 가져오기 (시트 ID 확인)
-        spreadsheet = sheet.get(spreadsheetId=SPREADSHEET_ID).execute()
-        sheet_id = None
-        for sheet_info in spreadsheet.get('sheets', []):
-            if sheet_info['properties']['title'] == SHEET_NAME:
-                sheet_id = sheet_info['properties']['sheetId']
-                break
-        
-        if sheet_id is None:
-            print(f"시트 '{SHEET_NAME}'를 찾을 수 없습니다.")
-            return
-        
-        # 현재 시트의 마지막 행 번호 확인
-        existing_data = sheet.values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{SHEET_NAME}'!A:H"
-        ).execute()
-        
-        existing_values = existing_data.get('values', [])
-        last_row = len(existing_values)  # 1-based index (다음에 추가할 행 번호)
-        
-        print(f"  디버깅: 현재 마지막 행 번호 = {last_row}")
-        
-        # 바로 위 행의 배경색 확인 (마지막 행이 있으면)
-        should_apply_gray = False
-        if last_row > 0:
+    # 현재 시트의 마지막 행 번호 확인
+    last_row = history.watermark  # 1-based index (다음에 추가할 행 번호)
+    
+    logger.debug(f"  디버깅: 현재 마지막 행 번호 = {last_row}")
+    
+    # 바로 위 행의 배경색 확인 (마지막 행이 있으면)
+    should_apply_gray = False
+    if last_row > 0:
+        try:
+            # 마지막 행의 첫 번째 셀(A열)의 배경색 확인
+            logger.debug(f"  디버깅: {last_row}행의 배경색 확인 중...")
+            cell_format = sheet.get(
+                spreadsheetId=spreadsheet_id,
+                ranges=[f"'{sheet_name}'!A{last_row}"],
+                fields='sheets.data.rowData.values.userEnteredFormat.backgroundColor'
+            ).execute()
+            
+            # 배경색 추출
+            bg_color = None
             try:
-                # 마지막 행의 첫 번째 셀(A열)의 배경색 확인
-                print(f"  디버깅: {last_row}행의 배경색 확인 중...")
-                cell_format = sheet.get(
-                    spreadsheetId=SPREADSHEET_ID,
-                    ranges=[f"'{SHEET_NAME}'!A{last_row}"],
-                    fields='sheets.data.rowData.values.userEnteredFormat.backgroundColor'
-                ).execute()
-                
-                # 배경색 추출
+                sheets_data = cell_format.get('sheets', [])
+                if sheets_data:
+                    sheet_data = sheets_data[0].get('data', [])
+                    if sheet_data:
+                        row_data = sheet_data[0]
+                        if row_data.get('rowData'):
+                            first_row = row_data['rowData'][0]
+                            if first_row.get('values') and len(first_row['values']) > 0:
+                                bg_color = first_row['values'][0].get('userEnteredFormat', {}).get('backgroundColor')
+                                logger.debug(f"  디버깅: 배경색 추출 성공 - {bg_color}")
+            except (IndexError, KeyError, TypeError) as e:
+                # 배경색을 가져올 수 없으면 기본값으로 처리
                 bg_color = None
-                try:
-                    sheets_data = cell_format.get('sheets', [])
-                    if sheets_data:
-                        sheet_data = sheets_data[0].get('data', [])
-                        if sheet_data:
-                            row_data = sheet_data[0]
-                            if row_data.get('rowData'):
-                                first_row = row_data['rowData'][0]
-                                if first_row.get('values') and len(first_row['values']) > 0:
-                                    bg_color = first_row['values'][0].get('userEnteredFormat', {}).get('backgroundColor')
-                                    print(f"  디버깅: 배경색 추출 성공 - {bg_color}")
-                except (IndexError, KeyError, TypeError) as e:
-                    # 배경색을 가져올 수 없으면 기본값으로 처리
-                    bg_color = None
-                    print(f"  디버깅: 배경색 추출 실패 - {e}")
-                
-                # 배경색 적용 조건:
-                # 배경색을 확인할 수 없거나 색상이 있으면 → 배경색 적용 안 함
-                # 오직 흰색이거나 없거나 연한 회색1일 때만 → 연한 회색2 적용
-                if bg_color is None:
-                    # 배경색을 확인할 수 없으면 기본적으로 적용하지 않음
-                    should_apply_gray = False
-                    print(f"  배경색을 확인할 수 없어 배경색을 적용하지 않습니다.")
-                elif is_light_gray2(bg_color):
-                    # 연한 회색2이면 배경색 적용 안 함 (이미 회색이므로)
-                    should_apply_gray = False
-                    print(f"  바로 위 행이 연한 회색2여서 배경색을 적용하지 않습니다.")
-                elif is_white_or_no_color(bg_color) or is_light_gray1(bg_color):
-                    # 흰색이거나 없거나 연한 회색1이면 연한 회색2 적용
-                    should_apply_gray = True
-                    print(f"  바로 위 행이 흰색/없음/연한회색1이어서 연한 회색2를 적용합니다.")
-                else:
-                    # 다른 색상이 있으면 배경색 적용 안 함
-                    should_apply_gray = False
-                    print(f"  바로 위 행에 다른 색상이 있어 배경색을 적용하지 않습니다. (RGB: {bg_color.get('red', 0):.3f}, {bg_color.get('green', 0):.3f}, {bg_color.get('blue', 0):.3f})")
-            except Exception as e:
-                # 배경색 확인 실패 시 기본적으로 회색 적용하지 않음
-                print(f"  배경색 확인 중 오류 발생 (기본값 사용): {e}")
-                import traceback
-                traceback.print_exc()
+                logger.debug(f"  디버깅: 배경색 추출 실패 - {e}")
+            
+            # 배경색 적용 조건:
+            # 배경색을 확인할 수 없거나 색상이 있으면 → 배경색 적용 안 함
+            # 오직 흰색이거나 없거나 연한 회색1일 때만 → 연한 회색2 적용
+            if bg_color is None:
+                # 배경색을 확인할 수 없으면 기본적으로 적용하지 않음
                 should_apply_gray = False
-        else:
-            # 데이터가 없으면 첫 번째 행이므로 회색 적용 안 함
+                logger.debug(f"  배경색을 확인할 수 없어 배경색을 적용하지 않습니다.")
+            elif is_light_gray2(bg_color):
+                # 연한 회색2이면 배경색 적용 안 함 (이미 회색이므로)
+                should_apply_gray = False
+                logger.debug(f"  바로 위 행이 연한 회색2여서 배경색을 적용하지 않습니다.")
+            elif is_white_or_no_color(bg_color) or is_light_gray1(bg_color):
+                # 흰색이거나 없거나 연한 회색1이면 연한 회색2 적용
+                should_apply_gray = True
+                logger.debug(f"  바로 위 행이 흰색/없음/연한회색1이어서 연한 회색2를 적용합니다.")
+            else:
+                # 다른 색상이 있으면 배경색 적용 안 함
+                should_apply_gray = False
+                logger.debug(f"  바로 위 행에 다른 색상이 있어 배경색을 적용하지 않습니다. (RGB: {bg_color.get('red', 0):.3f}, {bg_color.get('green', 0):.3f}, {bg_color.get('blue', 0):.3f})")
+        except Exception as e:
+            # 배경색 확인 실패 시 기본적으로 회색 적용하지 않음
+            logger.warning(f"  배경색 확인 중 오류 발생 (기본값 사용): {e}", exc_info=True)
             should_apply_gray = False
-            print(f"  디버깅: 데이터가 없어 첫 번째 행입니다.")
-        
-        # 각 키워드의 이전 순위를 조회하여 순위상승 계산
-        print("  이전 순위 조회 중...")
-        for result in results:
-            category_id = result.get('카테고리ID', '')
-            keyword = result.get('키워드', '')
-            current_rank = result.get('순위', '')
-            current_date = result.get('오늘날짜', '')
-            
-            if category_id and keyword and current_rank:
-                previous_rank = get_previous_rank(
-                    sheet, SPREADSHEET_ID, SHEET_NAME, 
-                    category_id, keyword, current_date
-                )
-                rank_change = calculate_rank_change(current_rank, previous_rank)
-                result['순위상승'] = rank_change
-                # 디버깅 정보 출력
-                if previous_rank is not None:
-                    print(f"    {keyword}: 이전 {previous_rank}위 → 현재 {current_rank}위 = {rank_change}")
-                else:
-                    print(f"    {keyword}: 이전 데이터 없음 = {rank_change}")
-        
-        print("  텍스트 색상: ▲와 new는 빨간색, ▼는 파란색, (-)는 검정색으로 설정됩니다.")
-        
-        # 데이터를 스프레드시트 형식으로 변환
-        # A열: 날짜, B열: 유형, C열: 카테고리ID, D열: 카테고리, 
-        # E열: 순위, F열: 키워드, G열: 순위상승, H열: 체크박스(TRUE)
-        values = []
-        for result in results:
-            row = [
-                result['오늘날짜'],      # A열: 날짜
-                result['유형'],          # B열: 유형
-                result['카테고리ID'],     # C열: 카테고리ID
-                result['카테고리'],       # D열: 카테고리
-                result['순위'],          # E열: 순위
-                result['키워드'],        # F열: 키워드
-                result['순위상승'],      # G열: 순위상승
-                'TRUE'                   # H열: 체크박스
-            ]
-            values.append(row)
-        
-        # 스프레드시트에 데이터 추가 (append)
-        body = {
-            'values': values
-        }
-        
-        append_result = sheet.values().append(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"'{SHEET_NAME}'!A:H",
-            valueInputOption='USER_ENTERED',
-            insertDataOption='INSERT_ROWS',
-            body=body
-        ).execute()
+    else:
+        # 데이터가 없으면 첫 번째 행이므로 회색 적용 안 함
+        should_apply_gray = False
+        logger.debug(f"  디버깅: 데이터가 없어 첫 번째 행입니다.")
+    
+    # 각 키워드의 이전 순위를 조회하여 순위상승 계산
+    logger.debug("  이전 순위 조회 중...")
+    targets = [
+        result for result in results
+        if result.get('카테고리ID', '') and result.get('키워드', '') and result.get('순위', '')
+    ]
+    previous_ranks = [
+        history.get_previous_rank(result['카테고리ID'], result['키워드'], result.get('오늘날짜', ''))
+        for result in targets
+    ]
+    _, rank_changes, target_colors = calculate_rank_changes([result['순위'] for result in targets], previous_ranks)
+    
+    verbose = logger.isEnabledFor(logging.DEBUG)
+    colors_by_result = {}
+    for result, previous_rank, rank_change, color in zip(targets, previous_ranks, rank_changes, target_colors):
+        result['순위상승'] = rank_change
+        colors_by_result[id(result)] = color
+        # 디버깅 정보 출력
+        if not verbose:
+            continue
+        if previous_rank is not None:
+            logger.debug(f"    {result['키워드']}: 이전 {previous_rank}위 → 현재 {result['순위']}위 = {rank_change}")
+        else:
+            logger.debug(f"    {result['키워드']}: 이전 데이터 없음 = {rank_change}")
+    
+    logger.debug("  텍스트 색상: ▲와 new는 빨간색, ▼는 파란색, (-)는 검정색으로 설정됩니다.")
+    
+    # 데이터를 스프레드시트 형식으로 변환
+    # A열: 날짜, B열: 유형, C열: 카테고리ID, D열: 카테고리, 
+    # E열: 순위, F열: 키워드, G열: 순위상승, H열: 체크박스(TRUE)
+    values = []
+    for result in results:
+        row = [
+            result['오늘날짜'],      # A열: 날짜
+            result['유형'],          # B열: 유형
+            result['카테고리ID'],     # C열: 카테고리ID
+            result['카테고리'],       # D열: 카테고리
+            result['순위'],          # E열: 순위
+            result['키워드'],        # F열: 키워드
+            result['순위상승'],      # G열: 순위상승
+            'TRUE'                   # H열: 체크박스
+        ]
+        values.append(row)
+    
+    # 스프레드시트에 데이터 추가 (append)
+    body = {
+        'values': values
+    }
+    
+    append_result = sheet.values().append(
+        spreadsheetId=spreadsheet_id,
+        range=f"'{sheet_name}'!A:H",
+        valueInputOption='USER_ENTERED',
+        insertDataOption='INSERT_ROWS',
+        body=body
+    ).execute()
+    
+    updated_cells = append_result.get('updates', {}).get('updatedCells', 0)
+    updated_range = append_result.get('updates', {}).get('updatedRange', '')
+    
+    # 추가한 행이 인덱스의 바로 다음 행이면 인덱스에도 반영
+    # (그 사이에 다른 행이 추가되었다면 다음 refresh에서 함께 읽음)
+    range_match = re.search(r'A(\d+):H(\d+)', updated_range)
+    if range_match and int(range_match.group(1)) == history.watermark + 1:
+        history.add_rows(values)
+    
+    # 키워드 역색인에도 추가한 행 반영 (중간에 빠진 행이 있으면 시트에서 새 행만 읽어 맞춤)
+    if keyword_index is not None and range_match:
+        try:
+            start_row = int(range_match.group(1))
+            if start_row == keyword_index.watermark + 1:
+                keyword_index.add_rows(values, start_row)
+            elif start_row > keyword_index.watermark + 1:
+                keyword_index.sync(sheet, spreadsheet_id, sheet_name)
+        except Exception as e:
+            logger.warning(f"  키워드 색인 갱신 중 오류 발생 (다음 실행 때 다시 맞춤): {e}")
+    
+    return {
+        'sheet_id': sheet_id,
+        'updated_range': updated_range,
+        'updated_cells': updated_cells,
+        'background': 'gray' if should_apply_gray else 'white',
+        # 순위를 비교하지 않은 행(카테고리ID/키워드/순위가 없는 행)은 기존 G열 값으로 색상 결정
+        'colors': [
+            colors_by_result.get(id(result)) or get_rank_change_color(result.get('순위상승', ''))
+            for result in results
+        ]
+    }
+
+def write_to_sheet(results, spreadsheet_id=SPREADSHEET_ID, sheet_name=SHEET_NAME, sheet=None,
+                   journal=None, journal_key=None, history=None, keyword_index=None):
+    """
+    추출된 키워드 정보를 Google Sheets에 입력합니다.
+    
+    journal이 주어지면 행 추가(appended)와 서식 적용(formatted) 단계를 기록하고,
+    이전 실행이 행 추가 후에 중단되었다면 다시 추가하지 않고 서식 적용부터 이어서 진행합니다.
+    
+    Args:
+        results: 추출된 키워드 정보 리스트
+        spreadsheet_id: 스프레드시트 ID
+        sheet_name: 탑텐키워드 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
+        journal: 진행 상황 저널 (RunJournal, 선택)
+        journal_key: 저널에서 사용할 행 키
+        history: 이력 순위 인덱스 (RankHistoryIndex, 여러 카테고리를 처리할 때 재사용)
+        keyword_index: 키워드 → 카테고리 역색인 (KeywordIndex, 선택)
+    
+    Returns:
+        입력과 서식 적용이 완료되었으면 True (이전 실행에서 완료된 경우 포함), 아니면 False
+    """
+    if not results:
+        logger.warning("스프레드시트에 입력할 데이터가 없습니다.")
+        return False
+    
+    entry = journal.get(journal_key) if journal is not None else None
+    if entry and entry['state'] == 'formatted':
+        logger.info("  이전 실행에서 이미 입력과 서식 적용이 완료되었습니다.")
+        return True
+    
+    try:
+        if sheet is None:
+            sheet = get_sheet_service()
         
-        updated_cells = append_result.get('updates', {}).get('updatedCells', 0)
-        updated_range = append_result.get('updates', {}).get('updatedRange', '')
+        if entry and entry['state'] == 'appended':
+            # 이전 실행에서 행 추가까지 완료됨 → 중복 추가하지 않고 서식 적용부터 재개
+            logger.info(f"  이전 실행에서 추가된 범위({entry['updated_range']})에 서식 적용부터 이어서 진행합니다.")
+            results = entry['results']
+            appended = entry
+        else:
+            appended = append_results(results, spreadsheet_id, sheet_name, sheet, history, keyword_index)
+            if appended is None:
+                return False
+            if journal is not None:
+                journal.record(journal_key, 'appended', results=results, **appended)
         
-        # G열(순위상승) 텍스트 색상 설정
-        import re
-        range_match = re.search(r'A(\d+):H(\d+)', updated_range)
+        # G열(순위상승) 텍스트 색상 + 배경색 설정 (한 번의 batchUpdate로 처리)
+        range_match = re.search(r'A(\d+):H(\d+)', appended['updated_range'])
         if range_match:
             start_row = int(range_match.group(1))
-            end_row = int(range_match.group(2))
-            
-            # G열(인덱스 6)에 텍스트 색상 설정
-            text_color_requests = []
             
-            for idx, result in enumerate(results):
-                rank_change = result.get('순위상승', '')
-                row_idx = start_row - 1 + idx  # 0-based index
-                
-                if rank_change.startswith('▲') or rank_change == 'new':
-                    # 빨간색 텍스트
-                    text_color_requests.append({
-                        'repeatCell': {
-                            'range': {
-                                'sheetId': sheet_id,
-                                'startRowIndex': row_idx,
-                                'endRowIndex': row_idx + 1,
-                                'startColumnIndex': 6,  # G열
-                                'endColumnIndex': 7
-                            },
-                            'cell': {
-                                'userEnteredFormat': {
-                                    'textFormat': {
-                                        'foregroundColor': {
-                                            'red': 1.0,
-                                            'green': 0.0,
-                                            'blue': 0.0
-                                        }
-                                    }
-                                }
-                            },
-                            'fields': 'userEnteredFormat.textFormat.foregroundColor'
-                        }
-                    })
-                elif rank_change.startswith('▼'):
-                    # 파란색 텍스트
-                    text_color_requests.append({
-                        'repeatCell': {
-                            'range': {
-                                'sheetId': sheet_id,
-                                'startRowIndex': row_idx,
-                                'endRowIndex': row_idx + 1,
-                                'startColumnIndex': 6,  # G열
-                                'endColumnIndex': 7
-                            },
-                            'cell': {
-                                'userEnteredFormat': {
-                                    'textFormat': {
-                                        'foregroundColor': {
-                                            'red': 0.0,
-                                            'green': 0.0,
-                                            'blue': 1.0
-                                        }
-                                    }
-                                }
-                            },
-                            'fields': 'userEnteredFormat.textFormat.foregroundColor'
-                        }
-                    })
-                elif rank_change == '(-)':
-                    # 검정색 텍스트
-                    text_color_requests.append({
-                        'repeatCell': {
-                            'range': {
-                                'sheetId': sheet_id,
-                                'startRowIndex': row_idx,
-                                'endRowIndex': row_idx + 1,
-                                'startColumnIndex': 6,  # G열
-                                'endColumnIndex': 7
-                            },
-                            'cell': {
-                                'userEnteredFormat': {
-                                    'textFormat': {
-                                        'foregroundColor': {
-                                            'red': 0.0,
-                                            'green': 0.0,
-                                            'blue': 0.0
-                                        }
-                                    }
-                                }
-                            },
-                            'fields': 'userEnteredFormat.textFormat.foregroundColor'
-                        }
-                    })
+            # 색상은 append_results에서 순위와 함께 계산한 값을 사용 (이전 형식의 저널이면 다시 계산)
+            format_requests = build_format_requests(
+                appended['sheet_id'], start_row,
+                [result.get('순위상승', '') for result in results],
+                background=appended['background'],
+                colors=appended.get('colors')
+            )
             
-            # 텍스트 색상 적용
-            if text_color_requests:
-                text_color_body = {
-                    'requests': text_color_requests
-                }
+            if format_requests:
                 sheet.batchUpdate(
-                    spreadsheetId=SPREADSHEET_ID,
-                    body=text_color_body
+                    spreadsheetId=spreadsheet_id,
+                    body={'requests': format_requests}
                 ).execute()
         
-        # 배경색 적용이 필요한 경우
-        if should_apply_gray:
-            # 추가된 행의 범위 확인 (range_match는 이미 위에서 계산됨)
-            if range_match:
-                start_row = int(range_match.group(1))
-                end_row = int(range_match.group(2))
-                
-                # 연한 회색2 배경색 설정 (RGB: 230, 230, 230) - 더 연한 회색
-                light_gray2 = {
-                    'red': 230.0 / 255.0,
-                    'green': 230.0 / 255.0,
-                    'blue': 230.0 / 255.0
-                }
-                
-                # 배경색 적용 요청
-                requests = [{
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': sheet_id,
-                            'startRowIndex': start_row - 1,  # 0-based index
-                            'endRowIndex': end_row,
-                            'startColumnIndex': 0,  # A열
-                            'endColumnIndex': 9     # I열까지 (0-based: A=0, B=1, ..., I=8)
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': light_gray2
-                            }
-                        },
-                        'fields': 'userEnteredFormat.backgroundColor'
-                    }
-                }]
-                
-                batch_update_body = {
-                    'requests': requests
-                }
-                
-                sheet.batchUpdate(
-                    spreadsheetId=SPREADSHEET_ID,
-                    body=batch_update_body
-                ).execute()
-                
-                print(f"\n✓ 스프레드시트에 {len(values)}개의 행이 성공적으로 추가되었습니다.")
-                print(f"  총 {updated_cells}개의 셀이 업데이트되었습니다.")
-                print(f"  연한 회색2 배경색이 적용되었습니다.")
-            else:
-                print(f"\n✓ 스프레드시트에 {len(values)}개의 행이 성공적으로 추가되었습니다.")
-                print(f"  총 {updated_cells}개의 셀이 업데이트되었습니다.")
-        else:
-            # 배경색을 적용하지 않아야 하는 경우 흰색 배경색 명시적으로 설정
-            if range_match:
-                start_row = int(range_match.group(1))
-                end_row = int(range_match.group(2))
-                
-                # 흰색 배경색 설정 (RGB: 255, 255, 255)
-                white_color = {
-                    'red': 1.0,
-                    'green': 1.0,
-                    'blue': 1.0
-                }
-                
-                # 배경색 적용 요청
-                requests = [{
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': sheet_id,
-                            'startRowIndex': start_row - 1,  # 0-based index
-                            'endRowIndex': end_row,
-                            'startColumnIndex': 0,  # A열
-                            'endColumnIndex': 9     # I열까지 (0-based: A=0, B=1, ..., I=8)
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': white_color
-                            }
-                        },
-                        'fields': 'userEnteredFormat.backgroundColor'
-                    }
-                }]
-                
-                batch_update_body = {
-                    'requests': requests
-                }
-                
-                sheet.batchUpdate(
-                    spreadsheetId=SPREADSHEET_ID,
-                    body=batch_update_body
-                ).execute()
-                
-                print(f"\n✓ 스프레드시트에 {len(values)}개의 행이 성공적으로 추가되었습니다.")
-                print(f"  총 {updated_cells}개의 셀이 업데이트되었습니다.")
-                print(f"  흰색 배경색이 적용되었습니다.")
+        if journal is not None:
+            journal.record(journal_key, 'formatted')
+        
+        logger.debug(f"\n✓ 스프레드시트에 {len(results)}개의 행이 성공적으로 추가되었습니다.")
+        logger.debug(f"  총 {appended['updated_cells']}개의 셀이 업데이트되었습니다.")
+        if range_match:
+            if appended['background'] == 'gray':
+                logger.debug(f"  연한 회색2 배경색이 적용되었습니다.")
             else:
-                print(f"\n✓ 스프레드시트에 {len(values)}개의 행이 성공적으로 추가되었습니다.")
-                print(f"  총 {updated_cells}개의 셀이 업데이트되었습니다.")
+                logger.debug(f"  흰색 배경색이 적용되었습니다.")
+        return True
         
     except Exception as e:
-        print(f"\n✗ 스프레드시트 입력 중 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n✗ 스프레드시트 입력 중 오류 발생: {e}")
+        return False
+
+def _new_report():
+    """main() 실행 결과 집계"""
+    return {
+        'categories': 0,   # 처리한 카테고리(행) 수
+        'written': 0,      # 시트에 입력한 카테고리 수
+        'skipped': 0,      # 건너뛰거나 취소한 카테고리 수
+        'failed': 0,       # 파싱/입력에 실패한 카테고리 수
+        'unread': 0,       # I열 HTML을 읽지 못한 행 수 (J열이 비어 있으므로 다음 실행에서 다시 읽음)
+        'rows': 0,         # 입력한 키워드 행 수
+        'new': 0,
+        'up': 0,
+        'down': 0,
+        'risers': [],      # (상승폭, 키워드, 카테고리) 상위 TOP_MOVERS개
+        'fallers': [],     # (하락폭, 키워드, 카테고리) 상위 TOP_MOVERS개
+        'elapsed': 0.0,
+    }
+
+def _report_category(report, prefix, results, written, resumed=False):
+    """
+    카테고리 하나의 입력 결과를 집계에 더하고 한 줄로 출력합니다.
+    """
+    category = results[0].get('카테고리', '') if results else ''
+    if not written:
+        report['failed'] += 1
+        logger.warning(f"{prefix} {category}: ✗ 스프레드시트 입력 실패")
+        return
+    
+    new = up = down = 0
+    risers = []
+    fallers = []
+    for result in results:
+        rank_change = result.get('순위상승', '')
+        if rank_change == 'new':
+            new += 1
+        elif rank_change[:1] in ('▲', '▼'):
+            try:
+                amount = int(rank_change[1:])
+            except ValueError:
+                continue
+            if rank_change[0] == '▲':
+                up += 1
+                risers.append((amount, result['키워드'], category))
+            else:
+                down += 1
+                fallers.append((amount, result['키워드'], category))
+    
+    report['written'] += 1
+    report['rows'] += len(results)
+    report['new'] += new
+    report['up'] += up
+    report['down'] += down
+    report['risers'] = heapq.nlargest(TOP_MOVERS, report['risers'] + risers)
+    report['fallers'] = heapq.nlargest(TOP_MOVERS, report['fallers'] + fallers)
+    
+    resumed_note = " (이어서 처리)" if resumed else ""
+    logger.info(f"{prefix} {category}: ✓ {len(results)}개 입력 (new {new}, ▲{up}, ▼{down}){resumed_note}")
+
+def merge_reports(reports):
+    """
+    여러 main() 실행 결과 집계를 하나로 합칩니다. (여러 워크북을 동시에 처리할 때)
+    
+    Args:
+        reports: _new_report() 형식의 딕셔너리 리스트
+    
+    Returns:
+        합친 집계 딕셔너리
+    """
+    merged = _new_report()
+    for report in reports:
+        for key in ('categories', 'written', 'skipped', 'failed', 'unread', 'rows', 'new', 'up', 'down'):
+            merged[key] += report[key]
+        merged['risers'] = heapq.nlargest(TOP_MOVERS, merged['risers'] + report['risers'])
+        merged['fallers'] = heapq.nlargest(TOP_MOVERS, merged['fallers'] + report['fallers'])
+    return merged
+
+def log_report(report):
+    """
+    main() 실행 결과를 요약해서 출력합니다. (quiet 수준에서도 출력)
+    """
+    lines = [f"\n{'='*60}"]
+    partial = report['unread'] or report['failed']
+    if 'targets' in report:
+        succeeded, total = report['targets']
+        lines.append(f"대상 워크북: {succeeded}/{total}개 성공")
+        partial = partial or succeeded < total
+    status = "일부 처리 실패" if partial else "처리 완료"
+    lines += [
+        f"{status}: 카테고리 {report['categories']}개 "
+        f"(입력 {report['written']}, 건너뜀/취소 {report['skipped']}, 실패 {report['failed']}) "
+        f"- {report['elapsed']:.1f}초",
+        f"입력한 행: {report['rows']}개 (new {report['new']}, ▲ {report['up']}, ▼ {report['down']})",
+    ]
+    if report['unread']:
+        lines.append(f"I열을 읽지 못한 행: {report['unread']}개 (다음 실행에서 다시 시도)")
+    if report['risers']:
+        lines.append("순위 상승 상위: " + ", ".join(
+            f"{keyword}({category}) ▲{amount}" for amount, keyword, category in report['risers']
+        ))
+    if report['fallers']:
+        lines.append("순위 하락 상위: " + ", ".join(
+            f"{keyword}({category}) ▼{amount}" for amount, keyword, category in report['fallers']
+        ))
+    lines.append('=' * 60)
+    report_logger.info("\n".join(lines))
+    flush_logs()
 
-def main():
+def main(spreadsheet_id=SPREADSHEET_ID, source_sheet_name=SOURCE_SHEET_NAME, sheet_name=SHEET_NAME,
+         sheet=None, confirm=True, parse=parse_keywords, journal=None, history=None, keyword_index=None,
+         chunk_size=HTML_CHUNK_SIZE, label=None, summary=True):
     """
     시트에서 HTML을 읽어와 파싱하고 결과를 출력합니다.
+    
+    I열 HTML은 iter_html_rows로 chunk_size 행씩 나눠 읽으므로, 처리할 행이 많아도
+    한 번에 묶음 하나의 HTML만 메모리에 올립니다.
+    
+    행마다 처리 단계(parsed → appended → formatted → logged)를 저널에 기록하므로,
+    이전 실행이 중간에 종료되었다면 마지막으로 완료한 단계부터 이어서 진행합니다.
+    
+    Args:
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        sheet_name: 탑텐키워드 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
+        confirm: True이면 카테고리마다 입력 여부를 확인, False이면 바로 입력
+        parse: HTML 파싱 함수 (기본값: parse_keywords)
+        journal: 진행 상황 저널 (없으면 기본 저널 파일 사용)
+        history: 이력 순위 인덱스 (없으면 스프레드시트/이력 시트별 스냅샷에서 불러와 이번 실행 동안 재사용)
+        keyword_index: 키워드 → 카테고리 역색인 (없으면 스프레드시트/이력 시트별 기본 색인 파일 사용)
+        chunk_size: I열 HTML을 한 번에 읽을 행 수
+        label: 카테고리별 출력 앞에 붙일 이름 (여러 워크북을 동시에 처리할 때 구분용)
+        summary: True이면 끝날 때 최종 보고를 출력 (여러 실행을 합쳐서 보고할 때는 False)
+    
+    Returns:
+        처리 결과 집계 딕셔너리 (merge_reports / log_report 참고)
     """
-    print("시트에서 HTML을 읽어오는 중...")
-    print("-" * 50)
+    logger.debug("시트에서 HTML을 읽어오는 중...")
+    logger.debug("-" * 50)
+    start_time = time.time()
     
-    # 시트에서 HTML 목록 가져오기
-    html_rows = get_html_from_sheet()
+    if sheet is None:
+        sheet = get_sheet_service()
     
-    if not html_rows:
-        print("처리할 HTML이 없습니다. (J열이 빈칸인 행이 없습니다.)")
-        return
+    if journal is None:
+        journal = RunJournal()
+        journal.compact()
+    
+    if history is None:
+        history = RankHistoryIndex(default_snapshot_path(spreadsheet_id, sheet_name))
+    
+    if keyword_index is None:
+        keyword_index = KeywordIndex(default_index_path(spreadsheet_id, sheet_name))
+    
+    def log(row_number, log_message):
+        if update_processing_log(row_number, log_message, spreadsheet_id, source_sheet_name, sheet):
+            journal.record(make_row_key(spreadsheet_id, source_sheet_name, row_number), 'logged')
     
-    print(f"총 {len(html_rows)}개의 HTML을 찾았습니다.\n")
+    report = _new_report()
+    label_prefix = f"[{label}] " if label else ""
+    
+    # J열이 빈칸인 행 목록만 먼저 가져오기 (I열 HTML은 처리하면서 나눠서 읽음)
+    pending_rows = get_pending_rows(spreadsheet_id, source_sheet_name, sheet)
+    
+    if not pending_rows:
+        logger.info(f"{label_prefix}처리할 HTML이 없습니다. (J열이 빈칸인 행이 없습니다.)")
+        flush_logs()
+        return report
+    
+    # I열이 채워져 있는지는 HTML을 읽어 봐야 알 수 있으므로, 번호는 실제로 처리하는 행만 셈
+    logger.info(f"{label_prefix}J열이 빈칸인 행 {len(pending_rows)}개의 I열을 {chunk_size}행씩 읽어 "
+                f"HTML이 있는 행을 처리합니다.")
+    
+    def on_read_error(chunk):
+        report['unread'] += len(chunk)
     
     # 각 HTML을 순차적으로 처리
-    for idx, (row_number, html_content, category_id, expected_category_name) in enumerate(html_rows, start=1):
-        print(f"\n{'='*60}")
-        print(f"[{idx}/{len(html_rows)}] 행 {row_number} 처리 중...")
+    html_rows = iter_html_rows(spreadsheet_id, source_sheet_name, sheet, chunk_size, pending_rows, on_read_error)
+    for row_number, html_content, category_id, expected_category_name in html_rows:
+        report['categories'] += 1
+        idx = report['categories']
+        prefix = f"{label_prefix}[{idx}] 행 {row_number}"
+        logger.debug(f"\n{'='*60}")
+        logger.debug(f"{prefix} 처리 중...")
         if category_id:
-            print(f"카테고리ID: {category_id}")
+            logger.debug(f"카테고리ID: {category_id}")
         if expected_category_name:
-            print(f"시트의 카테고리명: {expected_category_name}")
-        print(f"{'='*60}\n")
+            logger.debug(f"시트의 카테고리명: {expected_category_name}")
+        logger.debug(f"{'='*60}\n")
         
         if not html_content.strip():
-            print(f"행 {row_number}: HTML이 비어있습니다. 건너뜁니다.")
-            update_processing_log(row_number, f"건너뜀: HTML이 비어있음")
+            logger.info(f"{prefix}: 건너뜀 (HTML이 비어있음)")
+            report['skipped'] += 1
+            log(row_number, f"건너뜀: HTML이 비어있음")
+            continue
+        
+        # 이전 실행의 진행 상황 확인 (HTML이 바뀌었으면 처음부터 다시 처리)
+        journal_key = make_row_key(spreadsheet_id, source_sheet_name, row_number)
+        digest = html_digest(html_content)
+        entry = journal.get(journal_key)
+        if entry and entry.get('html_digest') != digest:
+            entry = None
+        
+        if entry and entry['state'] in ('appended', 'formatted'):
+            # 이미 입력이 승인되어 시트에 추가된 행 → 남은 단계만 진행
+            logger.debug(f"이전 실행에서 중단된 행입니다. ({entry['state']} 단계부터 이어서 진행)")
+            written = write_to_sheet(entry['results'], spreadsheet_id, sheet_name, sheet, journal, journal_key,
+                                     history, keyword_index)
+            _report_category(report, prefix, entry['results'], written, resumed=True)
+            if written:
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                log(row_number, f"처리 완료: {timestamp}")
+                logger.debug(f"✓ 행 {row_number} 처리 완료 및 로그 기록됨")
             continue
         
         # HTML 파싱 및 결과 추출 (카테고리ID 전달)
-        results = parse_keywords(html_content, category_id)
+        if entry and entry['state'] == 'parsed':
+            # 이전 날짜에 파싱해 둔 결과는 오늘 날짜로 입력 (순위상승도 오늘 기준으로 다시 계산)
+            results = entry['results']
+            today = datetime.now().strftime('%Y-%m-%d')
+            for result in results:
+                if result.get('오늘날짜') != today:
+                    result['오늘날짜'] = today
+                    result['순위상승'] = ''
+        else:
+            results = parse(html_content, category_id)
+            if results:
+                journal.record(journal_key, 'parsed', html_digest=digest, results=results)
         
         if results:
             # HTML에서 파싱한 카테고리명 확인
@@ -913,41 +1010,390 @@ def main():
             # 카테고리명 불일치 확인
             if expected_category_name and parsed_category_name:
                 if expected_category_name.strip() != parsed_category_name.strip():
-                    print(f"\n⚠️ 경고: 카테고리명 불일치 감지!")
-                    print(f"  시트의 카테고리명 (D{row_number}): {expected_category_name}")
-                    print(f"  HTML에서 파싱한 카테고리명: {parsed_category_name}")
-                    print(f"\n  이는 I{row_number}열의 HTML이 잘못 입력되었을 가능성이 있습니다.")
-                    print(f"  자동으로 취소 처리합니다.")
-                    update_processing_log(row_number, f"⚠️ 취소됨: 카테고리명 불일치 (시트:{expected_category_name}, HTML:{parsed_category_name})")
+                    logger.warning(
+                        f"{prefix}: ⚠️ 카테고리명 불일치로 자동 취소\n"
+                        f"  시트의 카테고리명 (D{row_number}): {expected_category_name}\n"
+                        f"  HTML에서 파싱한 카테고리명: {parsed_category_name}\n"
+                        f"  I{row_number}열의 HTML이 잘못 입력되었을 가능성이 있습니다."
+                    )
+                    report['skipped'] += 1
+                    log(row_number, f"⚠️ 취소됨: 카테고리명 불일치 (시트:{expected_category_name}, HTML:{parsed_category_name})")
                     continue
             
-            print("\n=== 추출된 키워드 정보 ===\n")
-            print_results(results)
-            
-            # 사용자 확인 (15초 타임아웃)
-            response = input_with_timeout(
-                f"\n[{idx}/{len(html_rows)}] 스프레드시트에 데이터를 입력하시겠습니까? (y/n): ",
-                timeout=15,
-                default='y'
-            )
+            if confirm:
+                # 입력 여부를 판단할 수 있도록 확인 모드에서는 출력 수준과 관계없이 추출 결과를 보여줌
+                # (키워드마다 한 줄, 항목별 상세 출력은 verbose 수준에서만)
+                flush_logs()
+                sys.stdout.write(f"\n=== {prefix} 추출된 키워드 정보 ===\n\n")
+                if logger.isEnabledFor(logging.DEBUG):
+                    print_results(results, sys.stdout)
+                else:
+                    print_result_lines(results, sys.stdout)
+                # 사용자 확인 (15초 타임아웃)
+                response = input_with_timeout(
+                    f"\n[{idx}] 스프레드시트에 데이터를 입력하시겠습니까? (y/n): ",
+                    timeout=15,
+                    default='y'
+                )
+            else:
+                logger.debug("\n=== 추출된 키워드 정보 ===\n")
+                print_results(results)
+                response = 'y'
             
             if response == 'y' or response == 'yes':
-                write_to_sheet(results)
-                # 처리 완료 로그 작성
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                update_processing_log(row_number, f"처리 완료: {timestamp}")
-                print(f"✓ 행 {row_number} 처리 완료 및 로그 기록됨")
+                written = write_to_sheet(results, spreadsheet_id, sheet_name, sheet, journal, journal_key,
+                                         history, keyword_index)
+                _report_category(report, prefix, results, written)
+                # 처리 완료 로그 작성 (입력/서식 적용이 끝나지 않았으면 J열을 비워 두어 다음 실행에서 이어서 처리)
+                if written:
+                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    log(row_number, f"처리 완료: {timestamp}")
+                    logger.debug(f"✓ 행 {row_number} 처리 완료 및 로그 기록됨")
             else:
-                print("스프레드시트 입력을 취소했습니다.")
-                update_processing_log(row_number, f"취소됨: 사용자 취소")
+                logger.info(f"{prefix}: 스프레드시트 입력을 취소했습니다.")
+                report['skipped'] += 1
+                log(row_number, f"취소됨: 사용자 취소")
         else:
-            print("키워드를 찾을 수 없습니다.")
-            update_processing_log(row_number, f"오류: 키워드를 찾을 수 없음")
+            logger.warning(f"{prefix}: 키워드를 찾을 수 없습니다.")
+            report['failed'] += 1
+            log(row_number, f"오류: 키워드를 찾을 수 없음")
+    
+    if not report['categories'] and not report['unread']:
+        logger.info(f"{label_prefix}처리할 HTML이 없습니다. (J열이 빈칸인 행의 I열이 모두 비어있습니다.)")
+        flush_logs()
+        return report
+    
+    # 다음 실행이 새로 추가된 행만 읽도록 이력 스냅샷 저장
+    history.save()
+    
+    report['elapsed'] = time.time() - start_time
+    if summary:
+        log_report(report)
+    else:
+        flush_logs()
+    return report
+
+def backfill_rank_changes(spreadsheet_id=SPREADSHEET_ID, sheet_name=SHEET_NAME, sheet=None):
+    """
+    탑텐키워드 시트 전체 이력의 G열(순위상승)과 텍스트 색상을 다시 계산해 입력합니다.
+    
+    행마다 같은 카테고리ID/키워드의 그 날짜 이전 가장 최근 순위와 비교하며,
+    계산은 calculate_rank_changes로 한 번에 처리하고 값/색상도 각각 한 번의 요청으로 씁니다.
+    (날짜/순위가 올바르지 않은 행은 기존 G열 값을 그대로 둡니다.)
+    
+    Args:
+        spreadsheet_id: 스프레드시트 ID
+        sheet_name: 탑텐키워드 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
+    """
+    if sheet is None:
+        sheet = get_sheet_service()
+    
+    sheet_id = _find_sheet_id(sheet, spreadsheet_id, sheet_name)
+    if sheet_id is None:
+        return
+    
+    # 전체 이력을 한 번 읽어 인덱스 생성
+    rows = sheet.values().get(
+        spreadsheetId=spreadsheet_id,
+        range=f"'{sheet_name}'!A:H"
+    ).execute().get('values', [])
+    history = RankHistoryIndex()
+    history.add_rows(rows)
+    
+    # 다시 계산할 행 (0-based 행 번호, 현재 순위, 이전 순위)
+    row_indexes = []
+    current_ranks = []
+    previous_ranks = []
+    for row_idx, row in enumerate(rows):
+        if len(row) < 7:
+            continue
+        try:
+            row_date = datetime.strptime(row[0], '%Y-%m-%d').strftime('%Y-%m-%d')
+            current_rank = int(row[4])
+        except (ValueError, TypeError):
+            continue
+        row_indexes.append(row_idx)
+        current_ranks.append(current_rank)
+        previous_ranks.append(history.get_previous_rank(row[2], row[5], row_date))
+    
+    if not row_indexes:
+        logger.info("다시 계산할 행이 없습니다.")
+        return
     
-    print(f"\n{'='*60}")
-    print("모든 HTML 처리 완료!")
-    print(f"{'='*60}")
+    _, rank_changes, colors = calculate_rank_changes(current_ranks, previous_ranks)
+    
+    # G열 값: 다시 계산한 행은 새 값, 나머지는 기존 값 유지
+    g_values = [[row[6] if len(row) > 6 else ''] for row in rows]
+    for row_idx, rank_change in zip(row_indexes, rank_changes):
+        g_values[row_idx] = [rank_change]
+    
+    sheet.values().update(
+        spreadsheetId=spreadsheet_id,
+        range=f"'{sheet_name}'!G1:G{len(rows)}",
+        valueInputOption='USER_ENTERED',
+        body={'values': g_values}
+    ).execute()
+    
+    # 텍스트 색상 (다시 계산한 행만, 같은 색상이 이어지는 구간끼리 묶어서)
+    format_requests = []
+    position = 0
+    for first, last in _row_ranges([row_idx + 1 for row_idx in row_indexes]):
+        end = position + last - first + 1
+        format_requests.extend(build_format_requests(
+            sheet_id, first, rank_changes[position:end], colors=colors[position:end]
+        ))
+        position = end
+    
+    if format_requests:
+        sheet.batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={'requests': format_requests}
+        ).execute()
+    
+    changed = sum(
+        1 for row_idx, rank_change in zip(row_indexes, rank_changes)
+        if (rows[row_idx][6] if len(rows[row_idx]) > 6 else '') != rank_change
+    )
+    report_logger.info(f"✓ {len(row_indexes)}개 행의 순위상승을 다시 계산했습니다. (변경 {changed}개)")
+    
+    # 전체 이력을 읽은 김에 이력 스냅샷도 새로 저장 (다음 실행은 새로 추가된 행만 읽음)
+    history.save(default_snapshot_path(spreadsheet_id, sheet_name))
+
+def migrate_keywords(spreadsheet_id=SPREADSHEET_ID, sheet_name=SHEET_NAME, sheet=None):
+    """
+    탑텐키워드 시트 전체 이력의 F열(키워드)을 normalize_keyword로 정규화한 값으로 바꿉니다. (1회성)
+    
+    공백/전각 문자/유니코드 표기만 다른 키워드가 같은 키워드로 이어지도록 기존 이력을 맞추는 작업입니다.
+    값이 바뀌는 셀만, 연속된 구간끼리 묶어 한 번의 요청으로 씁니다.
+    이후 --backfill로 순위상승(G열)을 다시 계산하면 끊어져 있던 이력이 반영됩니다.
+    
+    같은 날짜(A열), 같은 카테고리(C열)에서 정규화하면 같아지는 키워드가 두 행 이상이면
+    어느 순위를 이력으로 쓸지 정할 수 없으므로, 그 행들은 바꾸지 않고 경고로 보고합니다.
+    
+    Args:
+        spreadsheet_id: 스프레드시트 ID
+        sheet_name: 탑텐키워드 시트 이름
+        sheet: Sheets API 서비스 객체 (없으면 새로 생성)
+    
+    Returns:
+        변경한 셀 수
+    """
+    if sheet is None:
+        sheet = get_sheet_service()
+    
+    rows = sheet.values().get(
+        spreadsheetId=spreadsheet_id,
+        range=f"'{sheet_name}'!A:F"
+    ).execute().get('values', [])
+    
+    # 정규화된 키워드별 행 번호 (같은 날짜, 같은 카테고리 안에서)
+    rows_by_key = {}
+    for row_number, row in enumerate(rows, start=1):
+        keyword = row[5] if len(row) > 5 else ''
+        if keyword:
+            key = (row[0], row[2], normalize_keyword(keyword))
+            rows_by_key.setdefault(key, []).append(row_number)
+    
+    collisions = [row_numbers for row_numbers in rows_by_key.values() if len(row_numbers) > 1]
+    colliding_rows = {row_number for row_numbers in collisions for row_number in row_numbers}
+    
+    # 바뀌는 셀의 행 번호 → 정규화된 키워드
+    changes = {}
+    for (_, _, normalized), row_numbers in rows_by_key.items():
+        for row_number in row_numbers:
+            if row_number not in colliding_rows and rows[row_number - 1][5] != normalized:
+                changes[row_number] = normalized
+    
+    for row_numbers in collisions[:10]:
+        row = rows[row_numbers[0] - 1]
+        details = ", ".join(
+            f"F{row_number} {rows[row_number - 1][5]!r}"
+            + (f" {rows[row_number - 1][4]}위" if len(rows[row_number - 1]) > 4 else "")
+            for row_number in row_numbers
+        )
+        logger.warning(f"  중복: {row[0]} {row[3] if len(row) > 3 else row[2]} - {details}")
+    if len(collisions) > 10:
+        logger.warning(f"  ... 외 {len(collisions) - 10}건")
+    if collisions:
+        logger.warning(f"⚠️ 정규화하면 같은 날짜/카테고리에서 겹치는 키워드 {len(collisions)}건 "
+                       f"({len(colliding_rows)}개 행)은 바꾸지 않았습니다. 중복 행을 정리한 뒤 다시 실행하세요.")
+    
+    if not changes:
+        logger.info("정규화할 키워드가 없습니다.")
+        flush_logs()
+        return 0
+    
+    # 연속된 행끼리 묶어서 한 번의 batchUpdate로 입력
+    row_ranges = _row_ranges(sorted(changes))
+    sheet.values().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body={
+            'valueInputOption': 'RAW',
+            'data': [
+                {
+                    'range': f"'{sheet_name}'!F{first}:F{last}",
+                    'values': [[changes[row_number]] for row_number in range(first, last + 1)]
+                }
+                for first, last in row_ranges
+            ]
+        }
+    ).execute()
+    
+    for row_number in sorted(changes)[:10]:
+        logger.info(f"  F{row_number}: {rows[row_number - 1][5]!r} → {changes[row_number]!r}")
+    if len(changes) > 10:
+        logger.info(f"  ... 외 {len(changes) - 10}개")
+    report_logger.info(f"✓ {len(changes)}개 키워드를 정규화했습니다. (순위상승 재계산: python toptenKeyword.py --backfill)")
+    flush_logs()
+    return len(changes)
+
+def get_drive_service():
+    """
+    Drive API 서비스 객체를 만듭니다. (스프레드시트 수정 시각 확인용)
+    
+    Returns:
+        files() 리소스 객체
+    """
+    load_api_key_dir()
+    from auth import get_credentials
+    from googleapiclient.discovery import build
+    
+    creds = get_credentials()
+    service = build('drive', 'v3', credentials=creds)
+    return service.files()
+
+def get_change_signal(sheet, spreadsheet_id, source_sheet_name, drive=None):
+    """
+    카테고리 시트가 바뀌었는지 판단하기 위한 가벼운 신호값을 가져옵니다.
+    
+    Drive의 modifiedTime을 우선 사용하고, Drive 권한이 없으면
+    A열 행 수와 J열 값으로 만든 값을 사용합니다. (I열 HTML은 읽지 않음)
+    신호값의 첫 항목('modifiedTime' 또는 'rows')으로 어느 방법을 사용했는지 알 수 있습니다.
+    
+    Args:
+        sheet: Sheets API 서비스 객체
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        drive: Drive API files() 객체 (없으면 행 수/J열 신호 사용)
+    
+    Returns:
+        비교 가능한 신호값 (이전 값과 다르면 변경된 것으로 판단)
+    """
+    if drive is not None:
+        try:
+            file_info = drive.get(fileId=spreadsheet_id, fields='modifiedTime').execute()
+            return ('modifiedTime', file_info.get('modifiedTime'))
+        except Exception as e:
+            logger.warning(f"  Drive 수정 시각 확인 실패, 행 수 확인으로 대체합니다: {e}")
+    
+    data = sheet.values().batchGet(
+        spreadsheetId=spreadsheet_id,
+        ranges=[f"'{source_sheet_name}'!A:A", f"'{source_sheet_name}'!J:J"]
+    ).execute()
+    value_ranges = data.get('valueRanges', [])
+    a_values = value_ranges[0].get('values', []) if len(value_ranges) > 0 else []
+    j_values = value_ranges[1].get('values', []) if len(value_ranges) > 1 else []
+    return ('rows', len(a_values), hash(tuple(tuple(row) for row in j_values)))
+
+def watch(spreadsheet_id=SPREADSHEET_ID, source_sheet_name=SOURCE_SHEET_NAME, sheet_name=SHEET_NAME,
+          interval=60, full_scan_every=10, chunk_size=HTML_CHUNK_SIZE):
+    """
+    카테고리 시트를 주기적으로 확인하여 새로 채워진(J열이 빈칸인) 행을 자동으로 처리합니다. (데몬 모드)
+    
+    매 주기마다 가벼운 변경 신호(get_change_signal)만 확인하고, 신호가 바뀌었을 때만
+    I열 HTML을 읽어 처리합니다. Sheets 클라이언트, 저널, 이력 순위 인덱스는 주기 사이에 그대로 재사용하고,
+    저널은 처리할 때마다 정리(compact)해서 파일이 계속 커지지 않게 합니다.
+    
+    Args:
+        spreadsheet_id: 스프레드시트 ID
+        source_sheet_name: 카테고리 시트 이름
+        sheet_name: 탑텐키워드 시트 이름
+        interval: 확인 주기 (초)
+        full_scan_every: 신호가 그대로여도 N번째 확인마다 한 번은 전체 확인
+                         (Drive 권한이 없을 때 I열만 붙여넣은 경우를 놓치지 않기 위함)
+        chunk_size: I열 HTML을 한 번에 읽을 행 수
+    """
+    sheet = get_sheet_service()
+    try:
+        drive = get_drive_service()
+    except Exception as e:
+        logger.warning(f"Drive 서비스를 만들 수 없어 행 수 확인으로 변경을 감지합니다: {e}")
+        drive = None
+    
+    journal = RunJournal()
+    journal.compact()
+    history = RankHistoryIndex(default_snapshot_path(spreadsheet_id, sheet_name))
+    keyword_index = KeywordIndex(default_index_path(spreadsheet_id, sheet_name))
+    
+    logger.info(f"감시 모드 시작: {interval}초마다 '{source_sheet_name}' 시트를 확인합니다. (종료: Ctrl+C)")
+    
+    last_signal = None
+    polls = 0
+    try:
+        while True:
+            try:
+                signal = get_change_signal(sheet, spreadsheet_id, source_sheet_name, drive)
+                if drive is not None and signal[0] != 'modifiedTime':
+                    # Drive 권한이 없으면 매번 실패하므로 이후로는 행 수/J열 신호만 사용
+                    logger.warning("Drive 수정 시각을 확인할 수 없어 이후로는 행 수 확인으로 변경을 감지합니다.")
+                    drive = None
+                full_scan = full_scan_every and polls % full_scan_every == 0
+                
+                if signal != last_signal or full_scan:
+                    try:
+                        main(spreadsheet_id, source_sheet_name, sheet_name, sheet=sheet, confirm=False,
+                             journal=journal, history=history, keyword_index=keyword_index, chunk_size=chunk_size)
+                    finally:
+                        # 완료(logged)된 행의 기록을 지워 저널이 주기마다 쌓이지 않게 함
+                        journal.compact()
+                    # 처리하면서 J열에 로그를 남겼으므로 처리 후의 신호를 기준으로 삼음
+                    last_signal = get_change_signal(sheet, spreadsheet_id, source_sheet_name, drive)
+            except Exception as e:
+                logger.exception(f"감시 중 오류 발생 (다음 주기에 다시 시도): {e}")
+            
+            polls += 1
+            flush_logs()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        logger.info("\n감시 모드를 종료합니다.")
+        flush_logs()
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="쿠팡 탑텐 키워드를 시트에 등록합니다.")
+    parser.add_argument('--watch', action='store_true',
+                        help="카테고리 시트를 주기적으로 확인하여 새 행을 자동 처리 (데몬 모드)")
+    parser.add_argument('--interval', type=int, default=60,
+                        help="감시 모드 확인 주기 (초, 기본값: 60)")
+    parser.add_argument('--full-scan-every', type=int, default=10,
+                        help="감시 모드에서 변경 신호와 관계없이 전체 확인할 주기 (확인 횟수, 기본값: 10)")
+    parser.add_argument('--chunk-size', type=int, default=HTML_CHUNK_SIZE,
+                        help=f"I열 HTML을 한 번에 읽을 행 수 (기본값: {HTML_CHUNK_SIZE})")
+    parser.add_argument('--migrate-keywords', action='store_true',
+                        help="탑텐키워드 시트 전체 이력의 키워드(F열)를 정규화 (1회성)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true',
+                           help="경고/오류와 최종 보고만 출력")
+    verbosity.add_argument('-v', '--verbose', action='store_true',
+                           help="키워드별 추출 결과와 순위 비교, 디버깅 정보까지 출력")
+    parser.add_argument('--backfill', action='store_true',
+                        help="탑텐키워드 시트 전체 이력의 순위상승(G열)과 색상을 다시 계산")
+    args = parser.parse_args()
+    configure_logging('quiet' if args.quiet else 'verbose' if args.verbose else 'normal')
+    
+    try:
+        if args.migrate_keywords:
+            migrate_keywords()
+        elif args.backfill:
+            backfill_rank_changes()
+        elif args.watch:
+            watch(interval=args.interval, full_scan_every=args.full_scan_every, chunk_size=args.chunk_size)
+        else:
+            main(chunk_size=args.chunk_size)
+    except ApiKeyDirError as e:
+        logger.error(f"오류: {e}")
+        flush_logs()
+        sys.exit(1)
 